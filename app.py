@@ -3,7 +3,6 @@ Broadgate - Home Page
 Main landing page with live demo
 """
 
-import os
 import streamlit as st
 
 # Page configuration
@@ -14,10 +13,13 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-from config import BRAND_NAME, PAGE_ICON, BROADGATE_PERSONA_ID, WEBHOOK_URL
+from config import BRAND_NAME, PAGE_ICON, BROADGATE_PERSONA_ID, WEBHOOK_URL, DEFAULT_GREETING
 from components import apply_custom_css, render_sidebar, show_conversation_modal, show_error_message, show_success_message
-from utils import create_conversation, end_conversation, init_db, scrape_website
-from utils.pdf_processor import extract_text_from_pdf, find_pdf_in_dir
+from utils import create_conversation, end_conversation, init_db
+from utils.conversation_pool import get_conversation_pool
+from utils.job_queue import get_post_call_workers
+from utils.outbox import get_webhook_dispatcher
+from utils.knowledge import get_knowledge_warmer
 
 # Apply styling and sidebar
 apply_custom_css()
@@ -26,6 +28,12 @@ render_sidebar()
 # Initialize database
 init_db()
 
+# Shared across all sessions; starts warming the knowledge base on first run
+knowledge_warmer = get_knowledge_warmer()
+conversation_pool = get_conversation_pool()  # None unless CONVERSATION_POOL_SIZE is set
+post_call_workers = get_post_call_workers()  # Turn ended calls into leads in the background
+webhook_dispatcher = get_webhook_dispatcher()  # Deliver queued lead webhooks
+
 # Initialize session state
 if "call_url" not in st.session_state:
     st.session_state.call_url = None
@@ -79,7 +87,7 @@ with col_demo1:
 
             custom_greeting = st.text_input(
                 "Custom Greeting (Speak First)",
-                value="Hello! I'm your AI assistant. How can I help you today?",
+                value=DEFAULT_GREETING,
                 help="The AI will speak this message immediately when the conversation starts."
             )
         
@@ -92,45 +100,35 @@ with col_demo1:
                     st.session_state.call_url = None
                     st.session_state.conversation_id = None
                     
+                    # A pre-created conversation only fits if nothing was customised
+                    uses_defaults = not (test_mode or custom_persona or custom_replica or custom_callback) \
+                        and custom_greeting == DEFAULT_GREETING
+                    pooled = conversation_pool.claim() if conversation_pool and uses_defaults else None
+                    
                     with st.spinner("Getting ready..."):
-                        # Try to load knowledge base from website first
-                        context_text = None
-                        knowledge_source = None
-                        
-                        # Primary: Try website scraping
-                        try:
-                            context_text = scrape_website("https://broadgatevoice.co.uk/")
-                            if context_text and len(context_text) > 100:
-                                knowledge_source = "website"
-                                st.toast("Loaded knowledge base from Broadgate website", icon="🌐")
-                        except Exception as e:
-                            st.warning(f"Could not load website: {e}")
+                        if pooled:
+                            result = {"conversation_url": pooled.conversation_url, "conversation_id": pooled.conversation_id}
+                        else:
+                            # Knowledge base is built in the background; only wait if the first build is still running
+                            knowledge = knowledge_warmer.snapshot() or knowledge_warmer.wait_ready(timeout=30)
+                            context_text = knowledge.text if knowledge else None
                         
-                        # Fallback: Try PDF if website failed
-                        if not context_text:
-                            pdf_path = None
-                            specific_path = os.path.join("Konwledge_Base", "Broadgate.pdf")
-                            if os.path.exists(specific_path):
-                                pdf_path = specific_path
-                            else:
-                                pdf_path = find_pdf_in_dir(".")
-                                
-                            if pdf_path:
-                                try:
-                                    context_text = extract_text_from_pdf(pdf_path)
-                                    knowledge_source = "PDF"
-                                    st.toast(f"Loaded knowledge base from {os.path.basename(pdf_path)}", icon="📚")
-                                except Exception as e:
-                                    st.warning(f"Could not load PDF: {e}")
-
-                        result = create_conversation(
-                            persona_id=custom_persona or BROADGATE_PERSONA_ID,
-                            replica_id=custom_replica or None,
-                            callback_url=custom_callback or WEBHOOK_URL,
-                            test_mode=test_mode,
-                            custom_greeting=custom_greeting,
-                            context_text=context_text
-                        )
+                            if knowledge:
+                                for warning in knowledge.errors:
+                                    st.warning(warning)
+                                if knowledge.source == "website":
+                                    st.toast("Loaded knowledge base from Broadgate website", icon="🌐")
+                                elif knowledge.source in ("PDF", "documents"):
+                                    st.toast(f"Loaded knowledge base from {knowledge.source_name}", icon="📚")
+
+                            result = create_conversation(
+                                persona_id=custom_persona or BROADGATE_PERSONA_ID,
+                                replica_id=custom_replica or None,
+                                callback_url=custom_callback or WEBHOOK_URL,
+                                test_mode=test_mode,
+                                custom_greeting=custom_greeting,
+                                context_text=context_text
+                            )
                         
                         # Validate response before setting session state
                         if not result or not result.get("conversation_url"):
@@ -138,6 +136,7 @@ with col_demo1:
                         
                         st.session_state.call_url = result.get("conversation_url")
                         st.session_state.conversation_id = result.get("conversation_id")
+                        st.session_state.test_mode = test_mode
                         
                         if test_mode:
                             show_success_message("Connection test started (AI will not join)")
@@ -153,7 +152,10 @@ with col_demo1:
         if st.button("🛑 End Call", type="secondary", use_container_width=True):
             try:
                 if st.session_state.conversation_id:
-                    end_conversation(st.session_state.conversation_id)
+                    # Also queues lead extraction (not for test calls, which the AI never joins);
+                    # the workers pick it up once the transcript is ready
+                    end_conversation(st.session_state.conversation_id,
+                                     process_transcript=not st.session_state.get("test_mode", False))
                 st.session_state.call_url = None
                 st.session_state.conversation_id = None
                 show_success_message("Call ended")
@@ -0,0 +1,116 @@
+"""
+Broadgate - Lead Backfill
+Re-run lead extraction over past conversations, e.g. after the extraction
+rules improve. Transcripts are fetched concurrently, extraction runs in a
+process pool, and each batch is written (with its checkpoint) in one
+transaction, so an interrupted run picks up where it stopped.
+
+Usage:
+    python backfill_leads.py                          # every conversation in the leads table
+    python backfill_leads.py --ids-file conversations.txt --run march-import
+    python backfill_leads.py --restart --batch-size 200 --concurrency 16 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.async_api import AsyncTavusAPI, run_sync
+from utils.database import init_db, get_lead_conversation_ids, get_backfilled_ids, reset_backfill, apply_lead_updates
+from utils.lead_extractor import default_engine
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-extract leads from past conversations")
+    parser.add_argument("--ids-file", help="File with one conversation ID per line (default: the leads table)")
+    parser.add_argument("--conv-id", action="append", dest="conv_ids", help="Conversation ID (repeatable)")
+    parser.add_argument("--run", default="default", help="Checkpoint name; reuse it to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and process everything again")
+    parser.add_argument("--batch-size", type=int, default=100, help="Conversations per transaction")
+    parser.add_argument("--concurrency", type=int, default=8, help="Transcript fetches in flight at once")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    return parser.parse_args()
+
+
+def extract_lead(messages: list) -> tuple:
+    """(name, email) from one transcript - runs in a worker process"""
+    found = default_engine.extract(messages)
+    return (
+        found["name"].value if "name" in found else None,
+        found["email"].value if "email" in found else None,
+    )
+
+
+def load_conversation_ids(args) -> list:
+    if args.conv_ids:
+        return args.conv_ids
+    if args.ids_file:
+        with open(args.ids_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return get_lead_conversation_ids()
+
+
+def fetch_batch(client: AsyncTavusAPI, conv_ids: list) -> dict:
+    return run_sync(client.fetch_transcripts(conv_ids)) if conv_ids else {}
+
+
+def main():
+    args = parse_args()
+    init_db()
+
+    if args.restart:
+        reset_backfill(args.run)
+    done = get_backfilled_ids(args.run)
+    pending = [c for c in dict.fromkeys(load_conversation_ids(args)) if c not in done]
+
+    print("\n" + "="*50)
+    print("Broadgate - Lead Backfill")
+    print("="*50 + "\n")
+    print(f"Run: {args.run} ({len(done)} already done, {len(pending)} to process)")
+    if not pending:
+        print("Nothing to do.")
+        return
+
+    client = AsyncTavusAPI(max_concurrency=args.concurrency)
+    batches = [pending[i:i + args.batch_size] for i in range(0, len(pending), args.batch_size)]
+    totals = {"processed": 0, "updated": 0, "failed": 0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        transcripts = fetch_batch(client, batches[0])
+        for number, batch in enumerate(batches, 1):
+            fetched = [c for c in batch if not isinstance(transcripts.get(c), Exception)]
+            errors = {c: transcripts.get(c) for c in batch if isinstance(transcripts.get(c), Exception)}
+            extracted = pool.map(extract_lead, [transcripts[c] or [] for c in fetched], chunksize=16)
+
+            # Fetch the next batch while this one is being extracted
+            next_batch = batches[number] if number < len(batches) else []
+            transcripts = fetch_batch(client, next_batch)
+
+            updates = [(c, name, email) for c, (name, email) in zip(fetched, extracted) if name or email]
+            apply_lead_updates(args.run, updates, fetched)
+
+            totals["processed"] += len(fetched)
+            totals["updated"] += len(updates)
+            totals["failed"] += len(errors)
+            for conv_id, error in errors.items():
+                print(f"✗ {conv_id}: {error}")
+            rate = totals["processed"] / (time.perf_counter() - started)
+            print(f"Batch {number}/{len(batches)}: {len(fetched)} processed, {len(updates)} with lead data, "
+                  f"{len(errors)} failed ({rate:.1f} conversations/s)")
+
+    elapsed = time.perf_counter() - started
+    print("\n" + "="*50)
+    print("BACKFILL COMPLETE!")
+    print(f"Processed: {totals['processed']}, updated: {totals['updated']}, failed: {totals['failed']}")
+    print(f"Took {elapsed:.1f}s ({totals['processed'] / elapsed:.1f} conversations/s)")
+    if totals["failed"]:
+        print(f"Re-run with --run {args.run} to retry the failed conversations.")
+    print("="*50 + "\n")
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
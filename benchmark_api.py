@@ -0,0 +1,197 @@
+"""
+Broadgate - API Latency Benchmark
+Drive create_conversation, end_conversation and extract_info_and_send_webhook
+against the local Tavus stand-in (tavus_stub.py) at several concurrency
+levels and report p50/p95/p99 latency and throughput per operation.
+
+Usage:
+    python benchmark_api.py
+    python benchmark_api.py --concurrency 1,8,32 --iterations 400 --latency lognormal:40,0.5
+    python benchmark_api.py --base-url http://127.0.0.1:8765 --json results.json
+
+By default the stand-in runs inside this process; pass --base-url to use one
+started separately (python tavus_stub.py), which keeps its work off this
+process' GIL. Leads are written to a temporary database, never to DB_PATH.
+
+The client's rate limiter (TAVUS_RATE_LIMIT) is off unless --rate-limit is
+given, so the numbers measure the client rather than the limiter; requests
+it throttles are reported per level either way.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tavus_stub import add_stub_arguments, start_stub_server, state_from_args
+
+
+OPERATIONS = ("create_conversation", "end_conversation", "extract_info_and_send_webhook", "call")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Tavus API client against a local stand-in")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="Comma-separated numbers of concurrent callers (default: 1,4,16)")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="Calls (create + end + extract) per concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls before each level")
+    parser.add_argument("--base-url", help="Use an already running stand-in instead of starting one")
+    parser.add_argument("--persona-id", default="pbenchmark")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own log output")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Client requests/s per endpoint class, as TAVUS_RATE_LIMIT (default: 0, off)")
+    add_stub_arguments(parser)
+    return parser.parse_args()
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarise(samples: dict, errors: dict, elapsed: float) -> dict:
+    """Per-operation count, error count, p50/p95/p99 (ms) and throughput (ops/s)"""
+    summary = {}
+    for operation in OPERATIONS:
+        values = sorted(samples[operation])
+        summary[operation] = {
+            "count": len(values),
+            "errors": errors[operation],
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "throughput": len(values) / elapsed if elapsed else 0.0,
+        }
+    return summary
+
+
+def throttle_counts(before: dict, after: dict) -> dict:
+    """Requests throttled and seconds waited per endpoint class between two get_api_stats() calls"""
+    counts = {}
+    for name, counters in after.items():
+        previous = before.get(name, {})
+        throttled = counters["throttled"] - previous.get("throttled", 0)
+        if throttled:
+            counts[name] = {"throttled": throttled,
+                            "throttle_wait": counters["throttle_wait"] - previous.get("throttle_wait", 0.0)}
+    return counts
+
+
+def run_level(api, persona_id: str, concurrency: int, iterations: int, warmup: int, get_stats) -> dict:
+    """Run iterations calls with concurrency workers and summarise them (get_stats: utils.api.get_api_stats)"""
+    samples = {operation: [] for operation in OPERATIONS}
+    errors = dict.fromkeys(OPERATIONS, 0)
+    lock = threading.Lock()
+
+    def timed(operation, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with lock:
+                errors[operation] += 1
+            raise
+        samples[operation].append(time.perf_counter() - started)
+        return result
+
+    def one_call(_):
+        started = time.perf_counter()
+        try:
+            conversation = timed("create_conversation", api.create_conversation, persona_id,
+                                 replica_id="rbenchmark", context_text="Broadgate benchmark context.")
+            conv_id = conversation["conversation_id"]
+            timed("end_conversation", api.end_conversation, conv_id)
+            timed("extract_info_and_send_webhook", api.extract_info_and_send_webhook, conv_id)
+        except Exception:
+            with lock:
+                errors["call"] += 1
+            return
+        samples["call"].append(time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_call, range(warmup)))
+        for operation in OPERATIONS:
+            samples[operation].clear()
+            errors[operation] = 0
+
+        stats_before = get_stats()
+        started = time.perf_counter()
+        list(executor.map(one_call, range(iterations)))
+        elapsed = time.perf_counter() - started
+
+    return {"concurrency": concurrency, "elapsed": elapsed, "operations": summarise(samples, errors, elapsed),
+            "throttled": throttle_counts(stats_before, get_stats())}
+
+
+def print_level(result: dict):
+    print(f"\nConcurrency {result['concurrency']} ({result['elapsed']:.2f}s)")
+    print(f"  {'operation':<32}{'ok':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for operation, stats in result["operations"].items():
+        print(f"  {operation:<32}{stats['count']:>6}{stats['errors']:>6}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['throughput']:>10.1f}")
+    for name, counts in result["throttled"].items():
+        print(f"  rate limiter: {counts['throttled']} {name} request(s) throttled, "
+              f"{counts['throttle_wait']:.2f}s waited")
+
+
+def main():
+    args = parse_args()
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_stub_server(state_from_args(args))
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # config reads the environment on import, so this must happen first
+    db_dir = tempfile.mkdtemp(prefix="broadgate-bench-")
+    os.environ["TAVUS_BASE_URL"] = base_url
+    os.environ["WEBHOOK_URL"] = f"{base_url.rstrip('/')}/webhook"
+    os.environ["DB_PATH"] = os.path.join(db_dir, "benchmark_leads.db")
+    os.environ.setdefault("API_KEY", "benchmark")
+    os.environ["TAVUS_RATE_LIMIT"] = str(args.rate_limit)
+
+    import utils as api
+    from utils.api import get_api_stats
+
+    print("\n" + "="*50)
+    print("Broadgate - API Benchmark")
+    print("="*50)
+    print(f"Target: {base_url} ({'in-process' if server else 'external'} stand-in)")
+    print(f"Iterations per level: {args.iterations}")
+    print(f"Client rate limit: {f'{args.rate_limit:g} requests/s per endpoint class' if args.rate_limit else 'off'}")
+
+    api.init_db()
+    results = []
+    for concurrency in levels:
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            result = run_level(api, args.persona_id, concurrency, args.iterations, args.warmup, get_api_stats)
+        results.append(result)
+        print_level(result)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"base_url": base_url, "iterations": args.iterations, "levels": results}, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if server:
+        server.shutdown()
+    print()
+    failed = any(r["operations"]["call"]["errors"] for r in results)
+    sys.exit(1 if failed and not (args.error_rate or args.error) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Broadgate - Knowledge Snapshot Builder
+Scrape the website and extract the knowledge documents ahead of time, and
+write them to a compressed snapshot file that app.py loads at startup.
+
+Usage:
+    python build_knowledge.py
+    python build_knowledge.py --url https://broadgatevoice.co.uk/ --url https://broadgatevoice.co.uk/about
+    python build_knowledge.py --crawl --output knowledge_snapshot.bgks
+"""
+
+import argparse
+import os
+import sys
+import time
+from config import KNOWLEDGE_URL, KNOWLEDGE_DIR, KNOWLEDGE_MAX_PAGES, KNOWLEDGE_SNAPSHOT_PATH
+from utils.crawler import crawl_site
+from utils.knowledge_index import SUPPORTED_EXTENSIONS, load_document_text
+from utils.snapshot import write_snapshot
+from utils.web_scraper import scrape_multiple_pages, split_pages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the prebuilt knowledge snapshot")
+    parser.add_argument("--url", action="append", dest="urls",
+                        help=f"Page to scrape (repeatable, default: {KNOWLEDGE_URL})")
+    parser.add_argument("--crawl", action="store_true",
+                        help="Crawl the whole site from the first --url instead of scraping single pages")
+    parser.add_argument("--max-pages", type=int, default=KNOWLEDGE_MAX_PAGES,
+                        help="Maximum pages when crawling")
+    parser.add_argument("--knowledge-dir", default=KNOWLEDGE_DIR,
+                        help="Directory of PDF/text/markdown documents to include")
+    parser.add_argument("--no-website", action="store_true", help="Only include documents")
+    parser.add_argument("--no-documents", action="store_true", help="Only include website pages")
+    parser.add_argument("--output", default=KNOWLEDGE_SNAPSHOT_PATH, help="Snapshot file to write")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    urls = args.urls or [KNOWLEDGE_URL]
+    sections = []
+
+    print("\n" + "="*50)
+    print("Broadgate - Knowledge Snapshot Build")
+    print("="*50 + "\n")
+
+    started = time.time()
+
+    if not args.no_website:
+        if args.crawl:
+            print(f"Crawling: {urls[0]}")
+            website_text = crawl_site(urls[0], max_pages=args.max_pages)
+        else:
+            website_text = scrape_multiple_pages(urls)
+        for url, text in split_pages(website_text):
+            if text:
+                sections.append((url or urls[0], "website", text))
+        print(f"✓ {len(sections)} website page(s)")
+
+    if not args.no_documents and os.path.isdir(args.knowledge_dir):
+        for name in sorted(os.listdir(args.knowledge_dir)):
+            path = os.path.join(args.knowledge_dir, name)
+            if not name.lower().endswith(SUPPORTED_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            text = load_document_text(path)
+            if text:
+                sections.append((name, "document", text))
+                print(f"✓ Document: {name} ({len(text)} characters)")
+            else:
+                print(f"✗ No text extracted from {name}")
+
+    if not sections:
+        print("ERROR: Nothing to write - no website pages or documents were loaded.")
+        sys.exit(1)
+
+    index = write_snapshot(args.output, sections, {"urls": urls, "crawl": args.crawl})
+    raw = sum(s["raw_length"] for s in index["sections"])
+    size = os.path.getsize(args.output)
+
+    print("\n" + "="*50)
+    print("BUILD COMPLETE!")
+    print(f"Snapshot: {args.output} (format v{index['version']})")
+    print(f"Sections: {len(index['sections'])}, {raw} bytes of text -> {size} bytes on disk")
+    print(f"Took {time.time() - started:.1f}s")
+    print("="*50 + "\n")
+
+
+if __name__ == "__main__":
+    main()
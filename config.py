@@ -23,6 +23,34 @@ TAVUS_API_KEY = get_config("API_KEY")
 BROADGATE_PERSONA_ID = get_config("BROADGATE_PERSONA_ID", "p92fb560a56c")
 WEBHOOK_URL = get_config("WEBHOOK_URL")
 REPLICA_ID = get_config("REPLICA_ID", "rfe12d8b9597")  # Default replica ID
+TAVUS_BASE_URL = get_config("TAVUS_BASE_URL", "https://tavusapi.com")  # Point at a local stand-in server for testing
+TAVUS_POOL_SIZE = int(get_config("TAVUS_POOL_SIZE", "20"))  # Keep-alive connections shared by all sessions
+TAVUS_MAX_RETRIES = int(get_config("TAVUS_MAX_RETRIES", "3"))
+TAVUS_RATE_LIMIT = float(get_config("TAVUS_RATE_LIMIT", "10"))  # Requests/s per endpoint class, shared by every session in the process; 0 disables
+TAVUS_RATE_BURST = float(get_config("TAVUS_RATE_BURST", "20"))
+TAVUS_METRICS = get_config("TAVUS_METRICS", "false").lower() == "true"  # Per-endpoint latency/error histograms
+TAVUS_METRICS_INTERVAL = int(get_config("TAVUS_METRICS_INTERVAL", "60"))  # Seconds between flushes to metrics hooks
+NAME_INDEX_TTL = int(get_config("NAME_INDEX_TTL", "300"))  # Seconds persona/document name lookups are cached
+
+# Conversation Configuration
+DEFAULT_GREETING = "Hello! I'm your AI assistant. How can I help you today?"
+CONVERSATION_POOL_SIZE = int(get_config("CONVERSATION_POOL_SIZE", "0"))  # Pre-created conversations; 0 disables the pool
+CONVERSATION_POOL_MAX_AGE = int(get_config("CONVERSATION_POOL_MAX_AGE", "240"))  # Seconds; keep below the Tavus timeout for unjoined calls
+
+# Post-Call Processing
+POST_CALL_WORKERS = int(get_config("POST_CALL_WORKERS", "2"))  # Threads in the app process; 0 leaves jobs to post_call_worker.py
+POST_CALL_MAX_ATTEMPTS = int(get_config("POST_CALL_MAX_ATTEMPTS", "8"))  # Transcript checks before giving up
+POST_CALL_POLL_INTERVAL = float(get_config("POST_CALL_POLL_INTERVAL", "2"))  # Seconds idle workers wait between queue checks
+
+# Webhook Delivery
+WEBHOOK_WORKERS = int(get_config("WEBHOOK_WORKERS", "2"))  # Outbox dispatcher threads; 0 disables delivery in this process
+WEBHOOK_MAX_ATTEMPTS = int(get_config("WEBHOOK_MAX_ATTEMPTS", "10"))  # Attempts before a delivery is dead-lettered
+WEBHOOK_TIMEOUT = float(get_config("WEBHOOK_TIMEOUT", "5"))
+WEBHOOK_BATCH_SIZE = int(get_config("WEBHOOK_BATCH_SIZE", "1"))  # Leads per gzip JSON-lines POST; 1 sends each lead on its own
+WEBHOOK_BATCH_MAX_BYTES = int(get_config("WEBHOOK_BATCH_MAX_BYTES", "262144"))  # Send a batch once this much payload is waiting
+WEBHOOK_BATCH_MAX_DELAY = float(get_config("WEBHOOK_BATCH_MAX_DELAY", "10"))  # Seconds a lead may wait for its batch to fill
+WEBHOOK_TRANSCRIPT = get_config("WEBHOOK_TRANSCRIPT", "full")  # Options: "full", "excerpt" or "digest"
+WEBHOOK_EXCERPT_CHARS = int(get_config("WEBHOOK_EXCERPT_CHARS", "500"))
 
 # Voice Configuration (British Accent)
 # Using ElevenLabs' British accent voice by default
@@ -30,7 +58,28 @@ TTS_ENGINE = get_config("TTS_ENGINE", "elevenlabs")  # Options: "cartesia" or "e
 BRITISH_VOICE_ID = get_config("BRITISH_VOICE_ID")  # ElevenLabs: Custom British Voice
 
 # Database Configuration
-DB_PATH = "broadgate_leads.db"
+DB_PATH = get_config("DB_PATH", "broadgate_leads.db")
+
+# Knowledge Base Cache Configuration
+CACHE_DIR = get_config("CACHE_DIR", ".cache")
+SCRAPE_CACHE_TTL = int(get_config("SCRAPE_CACHE_TTL", "3600"))  # Seconds before a cached page is revalidated
+SCRAPE_PARSER = get_config("SCRAPE_PARSER", "stream")  # stream, bs4, lxml, selectolax or auto
+SCRAPE_MAX_BYTES = int(get_config("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024)))  # Pages larger than this are abandoned
+SCRAPE_ALLOWED_TYPES = tuple(t.strip() for t in get_config("SCRAPE_ALLOWED_TYPES", "text/html,application/xhtml+xml,text/plain").split(",") if t.strip())
+
+# Knowledge Base Configuration
+KNOWLEDGE_URL = get_config("KNOWLEDGE_URL", "https://broadgatevoice.co.uk/")
+KNOWLEDGE_DIR = "Konwledge_Base"
+KNOWLEDGE_PDF_PATH = get_config("KNOWLEDGE_PDF_PATH", os.path.join(KNOWLEDGE_DIR, "Broadgate.pdf"))
+KNOWLEDGE_REFRESH_INTERVAL = int(get_config("KNOWLEDGE_REFRESH_INTERVAL", "900"))  # Seconds between background rebuilds
+KNOWLEDGE_CRAWL = get_config("KNOWLEDGE_CRAWL", "false").lower() == "true"  # Crawl the whole site instead of the home page
+KNOWLEDGE_MAX_PAGES = int(get_config("KNOWLEDGE_MAX_PAGES", "50"))
+PDF_WORKERS = int(get_config("PDF_WORKERS", "1"))  # Processes used to extract PDF pages in parallel
+KNOWLEDGE_SNAPSHOT_PATH = get_config("KNOWLEDGE_SNAPSHOT_PATH", "knowledge_snapshot.bgks")  # Built by build_knowledge.py
+
+# Conversation Context Budget
+CONTEXT_MAX_BYTES = int(get_config("CONTEXT_MAX_BYTES", "60000"))  # 0 disables the cap
+CONTEXT_PRIORITY_KEYWORDS = [k.strip() for k in get_config("CONTEXT_PRIORITY_KEYWORDS", "pricing,services,features,contact,about,faq").split(",") if k.strip()]
 
 # UI Configuration
 PAGE_TITLE = f"{BRAND_NAME} | Enterprise Edition"
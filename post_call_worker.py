@@ -0,0 +1,73 @@
+"""
+Broadgate - Post-Call Worker
+Process the post-call queue outside the Streamlit app. Run as many of these
+as needed (set POST_CALL_WORKERS=0 in the app to leave all the work to them).
+
+Usage:
+    python post_call_worker.py
+    python post_call_worker.py --threads 8
+    python post_call_worker.py --drain          # exit once nothing is due
+"""
+
+import argparse
+import time
+from config import POST_CALL_WORKERS
+from utils.database import init_db
+from utils.job_queue import PostCallWorkers, claim_job, process_job, get_job_counts
+from utils.outbox import get_webhook_dispatcher, claim_deliveries, claim_batch
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Process ended conversations into leads")
+    parser.add_argument("--threads", type=int, default=max(1, POST_CALL_WORKERS), help="Worker threads")
+    parser.add_argument("--drain", action="store_true", help="Process due jobs, then exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    init_db()
+    print(f"Post-call queue: {get_job_counts()}")
+    dispatcher = get_webhook_dispatcher()
+
+    if args.drain:
+        processed = 0
+        started = time.perf_counter()
+        while True:
+            job = claim_job()
+            if not job:
+                break
+            process_job(*job)
+            processed += 1
+        print(f"Processed {processed} job(s) in {time.perf_counter() - started:.1f}s")
+        print(f"Post-call queue: {get_job_counts()}")
+        if dispatcher:
+            # Attempt every due webhook once before exiting; retries wait for the next run
+            dispatcher.stop(timeout=30)
+            if dispatcher.batching:
+                batch, _ = claim_batch(dispatcher.batch_size, dispatcher.batch_max_bytes, 0)
+                while batch:
+                    dispatcher.deliver_batch(batch)
+                    batch, _ = claim_batch(dispatcher.batch_size, dispatcher.batch_max_bytes, 0)
+            deliveries = claim_deliveries()
+            while deliveries:
+                for delivery in deliveries:
+                    dispatcher.deliver(*delivery)
+                deliveries = claim_deliveries()
+            print(f"Webhooks: {dispatcher.stats()['outbox']}")
+        return
+
+    workers = PostCallWorkers(threads=args.threads)
+    workers.start()
+    print(f"Running {args.threads} worker thread(s) (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        workers.stop(timeout=30)
+        if dispatcher:
+            dispatcher.stop(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
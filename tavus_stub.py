@@ -0,0 +1,402 @@
+"""
+Broadgate - Local Tavus API Stand-in
+In-memory imitation of the Tavus endpoints utils/api.py uses, with
+configurable latency and error injection, for offline load testing.
+
+Usage:
+    python tavus_stub.py --port 8765
+    python tavus_stub.py --latency lognormal:40,0.5 --latency conversations.create=uniform:300,900
+    python tavus_stub.py --error-rate 0.02 --error conversations.end=0.1 --transcripts fixtures.json
+
+Then point the app (or benchmark_api.py --base-url) at it:
+    TAVUS_BASE_URL=http://127.0.0.1:8765 API_KEY=stub streamlit run app.py
+
+Latency specs (milliseconds): fixed:MS, uniform:LOW,HIGH, normal:MEAN,STDDEV
+or lognormal:MEDIAN,SIGMA. Endpoint names are the ones in
+utils/tavus_client.TIMEOUTS, plus "webhook" for the lead webhook sink at
+POST /webhook (JSON, or gzip-compressed JSON lines from batched delivery).
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+DEFAULT_TRANSCRIPTS = [
+    [
+        {"role": "assistant", "content": "Hi! I'm Gigi from Broadgate. What can I help you with?"},
+        {"role": "user", "content": "Hi, my name is Sarah Jones and I'd like to know about pricing."},
+        {"role": "assistant", "content": "Of course, Sarah! What's the best email to send details to?"},
+        {"role": "user", "content": "It's sarah.jones@example.com"},
+    ],
+    [
+        {"role": "assistant", "content": "Hello! How can I help you today?"},
+        {"role": "user", "content": "This is Tom. Do you integrate with Salesforce?"},
+        {"role": "assistant", "content": "We do! Can I take an email address to follow up?"},
+        {"role": "user", "content": "Sure, tom@acme.co.uk"},
+    ],
+    [
+        {"role": "assistant", "content": "Hi there! What brings you here today?"},
+        {"role": "user", "content": "Just browsing, thanks."},
+    ],
+]
+
+
+def parse_latency(spec: str):
+    """
+    Turn a latency spec into a function returning a delay in seconds
+
+    Args:
+        spec: "fixed:MS", "uniform:LOW,HIGH", "normal:MEAN,STDDEV" or "lognormal:MEDIAN,SIGMA"
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    try:
+        if kind == "fixed":
+            (ms,) = values or [0.0]
+            return lambda: ms / 1000
+        if kind == "uniform":
+            low, high = values
+            return lambda: random.uniform(low, high) / 1000
+        if kind == "normal":
+            mean, stddev = values
+            return lambda: max(0.0, random.gauss(mean, stddev)) / 1000
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda: random.lognormvariate(math.log(median), sigma) / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+class StubState:
+    """
+    Everything the stand-in server knows: stored objects, behaviour
+    settings and per-endpoint request counters.
+    """
+
+    def __init__(self, latency: dict = None, error_rates: dict = None, error_status: int = 503,
+                 transcripts: list = None, seed: int = None):
+        # latency / error_rates: endpoint name (or "default") -> spec / probability
+        self.latency = {name: parse_latency(spec) for name, spec in (latency or {}).items()}
+        self.error_rates = dict(error_rates or {})
+        self.error_status = error_status
+        self.transcripts = transcripts or DEFAULT_TRANSCRIPTS
+        self.random = random.Random(seed)
+
+        self.documents = {}
+        self.personas = {}
+        self.conversations = {}
+        self.webhooks = []
+        self.counters = {}
+        self._next_transcript = 0
+        self.lock = threading.Lock()
+
+    def delay(self, endpoint: str) -> float:
+        sample = self.latency.get(endpoint) or self.latency.get("default")
+        return sample() if sample else 0.0
+
+    def should_fail(self, endpoint: str) -> bool:
+        rate = self.error_rates.get(endpoint, self.error_rates.get("default", 0.0))
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def count(self, endpoint: str, status: int):
+        with self.lock:
+            counter = self.counters.setdefault(endpoint, {"requests": 0, "errors": 0})
+            counter["requests"] += 1
+            if status >= 400:
+                counter["errors"] += 1
+
+    def next_transcript(self) -> list:
+        with self.lock:
+            transcript = self.transcripts[self._next_transcript % len(self.transcripts)]
+            self._next_transcript += 1
+        return transcript
+
+
+def _apply_patch(target: dict, operations: list):
+    """Apply the add/replace/remove subset of JSON Patch that Tavus accepts for personas"""
+    for op in operations:
+        parts = [p.replace("~1", "/").replace("~0", "~") for p in op["path"].lstrip("/").split("/")]
+        parent = target
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+        if op["op"] in ("add", "replace"):
+            parent[parts[-1]] = op["value"]
+        elif op["op"] == "remove":
+            parent.pop(parts[-1], None)
+        else:
+            raise ValueError(f"Unsupported patch op: {op['op']}")
+
+
+def _paginate(items: list, query: dict) -> dict:
+    page = int(query.get("page", ["1"])[0])
+    limit = int(query.get("limit", ["100"])[0])
+    start = (page - 1) * limit
+    return {"data": items[start:start + limit], "total_count": len(items)}
+
+
+# (method, path pattern, endpoint name)
+ROUTES = [
+    ("GET", r"/v2/documents", "documents.list"),
+    ("POST", r"/v2/documents", "documents.create"),
+    ("GET", r"/v2/personas", "personas.list"),
+    ("POST", r"/v2/personas", "personas.create"),
+    ("GET", r"/v2/personas/(?P<id>[^/]+)", "personas.get"),
+    ("PATCH", r"/v2/personas/(?P<id>[^/]+)", "personas.update"),
+    ("POST", r"/v2/conversations", "conversations.create"),
+    ("POST", r"/v2/conversations/(?P<id>[^/]+)/end", "conversations.end"),
+    ("GET", r"/v2/conversations/(?P<id>[^/]+)/messages", "conversations.messages"),
+    ("POST", r"/webhook", "webhook"),
+]
+_ROUTES = [(method, re.compile(pattern + r"/?$"), endpoint) for method, pattern, endpoint in ROUTES]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the handle_* methods; the StubState is on self.server.state"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body go out in separate writes; without TCP_NODELAY, Nagle's
+    # algorithm and delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _dispatch(self, method: str):
+        state = self.server.state
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+
+        if url.path == "/_stats" and method == "GET":
+            with state.lock:
+                self._send(200, {"endpoints": state.counters, "webhooks": len(state.webhooks)})
+            return
+
+        for route_method, pattern, endpoint in _ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                break
+        else:
+            self._send(404, {"error": "Not found"})
+            return
+
+        time.sleep(state.delay(endpoint))
+
+        if endpoint != "webhook" and not self.headers.get("x-api-key"):
+            status, body = 401, {"error": "Missing x-api-key"}
+        elif state.should_fail(endpoint):
+            status, body = state.error_status, {"error": "Injected failure"}
+        else:
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                    payload = [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+                else:
+                    payload = json.loads(raw) if raw else None
+                handler = getattr(self, "handle_" + endpoint.replace(".", "_"))
+                status, body = handler(state, payload, parse_qs(url.query), **match.groupdict())
+            except (ValueError, KeyError, TypeError) as e:
+                status, body = 400, {"error": str(e)}
+
+        state.count(endpoint, status)
+        headers = {"Retry-After": "0"} if status in (429, 503) else None
+        self._send(status, body, headers)
+
+    def _send(self, status: int, body, headers: dict = None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    # ---------- Documents ----------
+
+    def handle_documents_list(self, state, payload, query):
+        with state.lock:
+            return 200, _paginate(list(state.documents.values()), query)
+
+    def handle_documents_create(self, state, payload, query):
+        document = {
+            "document_id": "d" + uuid.uuid4().hex[:12],
+            "document_name": payload["document_name"],
+            "document_url": payload["document_url"],
+            "status": "ready",
+        }
+        with state.lock:
+            state.documents[document["document_id"]] = document
+        return 200, document
+
+    # ---------- Personas ----------
+
+    def handle_personas_list(self, state, payload, query):
+        with state.lock:
+            return 200, _paginate(list(state.personas.values()), query)
+
+    def handle_personas_create(self, state, payload, query):
+        persona = dict(payload, persona_id="p" + uuid.uuid4().hex[:12], layers=payload.get("layers", {}))
+        with state.lock:
+            state.personas[persona["persona_id"]] = persona
+        return 200, persona
+
+    def handle_personas_get(self, state, payload, query, id):
+        with state.lock:
+            persona = state.personas.get(id)
+            return (200, persona) if persona else (404, {"error": "Persona not found"})
+
+    def handle_personas_update(self, state, payload, query, id):
+        with state.lock:
+            persona = state.personas.get(id)
+            if not persona:
+                return 404, {"error": "Persona not found"}
+            _apply_patch(persona, payload)
+            return 200, persona
+
+    # ---------- Conversations ----------
+
+    def handle_conversations_create(self, state, payload, query):
+        conversation_id = "c" + uuid.uuid4().hex[:12]
+        conversation = {
+            "conversation_id": conversation_id,
+            "conversation_url": f"https://tavus.daily.co/{conversation_id}",
+            "persona_id": payload["persona_id"],
+            "replica_id": payload.get("replica_id"),
+            "status": "active",
+            "messages": [
+                dict(message, message_id=f"{conversation_id}-{i}")
+                for i, message in enumerate(state.next_transcript())
+            ],
+        }
+        with state.lock:
+            state.conversations[conversation_id] = conversation
+        return 200, {k: v for k, v in conversation.items() if k != "messages"}
+
+    def handle_conversations_end(self, state, payload, query, id):
+        with state.lock:
+            conversation = state.conversations.get(id)
+            if not conversation:
+                return 404, {"error": "Conversation not found"}
+            conversation["status"] = "ended"
+        return 200, {"conversation_id": id, "status": "ended"}
+
+    def handle_conversations_messages(self, state, payload, query, id):
+        with state.lock:
+            conversation = state.conversations.get(id)
+        if not conversation:
+            return 404, {"error": "Conversation not found"}
+        messages = conversation["messages"]
+        after = query.get("after", [None])[0]
+        ids = [m["message_id"] for m in messages]
+        if after in ids:
+            messages = messages[ids.index(after) + 1:]
+        return 200, {"data": messages}
+
+    # ---------- Webhook sink ----------
+
+    def handle_webhook(self, state, payload, query):
+        with state.lock:
+            state.webhooks.extend(payload if isinstance(payload, list) else [payload])
+        return 200, {"status": "received"}
+
+
+def start_stub_server(state: StubState = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stand-in server on a daemon thread
+
+    Args:
+        state: Behaviour and storage (defaults to no latency and no errors)
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        The running ThreadingHTTPServer; its base URL is
+        f"http://{host}:{server.server_address[1]}". Call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = state or StubState()
+    threading.Thread(target=server.serve_forever, name="tavus-stub", daemon=True).start()
+    return server
+
+
+def parse_endpoint_options(values: list, convert) -> dict:
+    """Parse repeated [ENDPOINT=]VALUE options; a bare VALUE sets the default"""
+    options = {}
+    for value in values or []:
+        endpoint, sep, setting = value.partition("=")
+        if not sep:
+            endpoint, setting = "default", value
+        options[endpoint] = convert(setting)
+    return options
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Stand-in behaviour options, shared with benchmark_api.py"""
+    parser.add_argument("--latency", action="append", metavar="[ENDPOINT=]SPEC",
+                        help="Latency distribution, e.g. lognormal:40,0.5 or conversations.create=uniform:300,900 (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability any request fails")
+    parser.add_argument("--error", action="append", metavar="ENDPOINT=RATE",
+                        help="Failure probability for one endpoint (repeatable)")
+    parser.add_argument("--error-status", type=int, default=503, help="Status returned for injected failures")
+    parser.add_argument("--transcripts", help="JSON file with a list of transcripts (each a list of messages)")
+    parser.add_argument("--seed", type=int, help="Seed for error injection")
+
+
+def state_from_args(args) -> StubState:
+    latency = parse_endpoint_options(args.latency, str)
+    for spec in latency.values():
+        parse_latency(spec)  # fail fast on typos
+    error_rates = parse_endpoint_options(args.error, float)
+    if args.error_rate:
+        error_rates.setdefault("default", args.error_rate)
+
+    transcripts = None
+    if args.transcripts:
+        with open(args.transcripts, "r", encoding="utf-8") as f:
+            transcripts = json.load(f)
+
+    return StubState(latency, error_rates, args.error_status, transcripts, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Tavus API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_stub_server(state_from_args(args), args.host, args.port)
+    print(f"Tavus stand-in listening on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
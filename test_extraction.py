@@ -0,0 +1,33 @@
+"""
+Test script to verify lead extraction when one field's text overlaps another's
+"""
+
+from utils.lead_extractor import build_engine
+
+engine = build_engine(("name", "email", "phone", "company"))
+
+# message -> fields expected (fields left out must not be found)
+CASES = [
+    ("my name is john.smith@example.com", {"email": "john.smith@example.com"}),
+    ("this is Ann@corp.com", {"email": "Ann@corp.com"}),
+    ("My name is Jane Doe and my email is jane@x.io", {"name": "Jane Doe", "email": "jane@x.io"}),
+    ("my number is 07700 900123, email me at sam.hill@acme.com",
+     {"phone": "07700 900123", "email": "sam.hill@acme.com"}),
+    ("I work at Acme Ltd, my name is Sam Hill, sam.hill@acme.com",
+     {"name": "Sam Hill", "email": "sam.hill@acme.com", "company": "Acme Ltd"}),
+]
+
+print("Testing overlapping lead fields...")
+print("=" * 50)
+
+failed = 0
+for text, expected in CASES:
+    found = {field: match.value for field, match in engine.extract([{"role": "user", "content": text}]).items()}
+    if found == expected:
+        print(f"✓ {text}")
+    else:
+        failed += 1
+        print(f"✗ {text}\n    expected {expected}\n    got      {found}")
+
+print("-" * 50)
+print(f"{len(CASES) - failed}/{len(CASES)} passed")
@@ -2,9 +2,52 @@
 Test script to verify website scraping functionality
 """
 
-from utils.web_scraper import scrape_website
+import time
+from utils.web_scraper import PARSERS, scrape_website, html_to_text
 
-print("Testing website scraping...")
+print("Testing HTML parser backends agree...")
+print("=" * 50)
+
+# Every backend must decode and clean up text exactly like bs4
+CHARSET_CASES = {
+    "undeclared UTF-8": b"<html><body><p>caf\xc3\xa9</p></body></html>",
+    "meta charset iso-8859-1": b"<html><head><meta charset=iso-8859-1></head><body><p>caf\xe9</p></body></html>",
+    "UTF-8 BOM": b"\xef\xbb\xbf<html><body><p>caf\xc3\xa9</p></body></html>",
+    "XML declaration": b'<?xml version="1.0" encoding="utf-8"?><html><body><p>caf\xc3\xa9</p></body></html>',
+}
+
+for case, html in CHARSET_CASES.items():
+    expected = html_to_text(html, "bs4")
+    for parser in PARSERS:
+        try:
+            text = html_to_text(html, parser)
+        except ImportError:
+            continue
+        if text == expected:
+            print(f"✓ {parser}: {case}")
+        else:
+            print(f"✗ FAILED - {parser}: {case} gave {text!r}, bs4 gave {expected!r}")
+
+print("\nTesting HTML parser speed on a minified page...")
+print("=" * 50)
+
+# ~1 MB with no line breaks: the stream parser must stay linear in line length
+page = ("<html><body>" + "".join(
+    f"<div><span>item {i}</span> <a href='#'>link</a></div>" for i in range(20000)
+) + "</body></html>").encode()
+
+timings = {}
+for parser in ("stream", "bs4"):
+    started = time.perf_counter()
+    text = html_to_text(page, parser)
+    timings[parser] = time.perf_counter() - started
+
+if text == html_to_text(page, "stream") and timings["stream"] < timings["bs4"]:
+    print(f"✓ SUCCESS - stream {timings['stream']:.2f}s, bs4 {timings['bs4']:.2f}s on {len(page)} bytes")
+else:
+    print(f"✗ FAILED - stream {timings['stream']:.2f}s, bs4 {timings['bs4']:.2f}s on {len(page)} bytes")
+
+print("\nTesting website scraping...")
 print("=" * 50)
 
 url = "https://broadgatevoice.co.uk/"
@@ -0,0 +1,80 @@
+"""
+Test script to verify a damaged knowledge snapshot falls back to the live build
+"""
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+LIVE_TEXT = "Broadgate answers calls for estate agents around the clock. " * 5
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """The website the live build scrapes"""
+
+    def do_GET(self):
+        body = f"<html><body><p>{LIVE_TEXT}</p></body></html>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = HTTPServer(("127.0.0.1", 0), PageHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+# config reads the environment on import, so this must happen first
+snapshot_path = os.path.join(tempfile.mkdtemp(prefix="broadgate-snapshot-"), "knowledge_snapshot.bgks")
+os.environ["KNOWLEDGE_SNAPSHOT_PATH"] = snapshot_path
+os.environ["KNOWLEDGE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/"
+os.environ["KNOWLEDGE_CRAWL"] = "false"
+os.environ["SCRAPE_CACHE_TTL"] = "0"
+
+from utils.knowledge import build_knowledge_snapshot
+from utils.snapshot import SnapshotError, SnapshotReader, write_snapshot
+
+print("Testing damaged knowledge snapshots...")
+print("=" * 50)
+
+sections = [("https://broadgatevoice.co.uk/", "website", "Snapshot text about Broadgate. " * 50)]
+write_snapshot(snapshot_path, sections)
+full_size = os.path.getsize(snapshot_path)
+
+failed = 0
+for label, size in [("index cut off", 30), ("section cut off", full_size - 20)]:
+    write_snapshot(snapshot_path, sections)
+    with open(snapshot_path, "r+b") as f:
+        f.truncate(size)
+
+    try:
+        SnapshotReader(snapshot_path).close()
+        error = None
+    except SnapshotError as e:
+        error = e
+    snapshot = build_knowledge_snapshot()
+
+    if error and snapshot.source == "website" and LIVE_TEXT.strip() in snapshot.text:
+        print(f"✓ {label}: {error}; built live from {snapshot.source_name}")
+    else:
+        failed += 1
+        print(f"✗ {label}: error={error!r}, source={snapshot.source}")
+
+# A section whose bytes are damaged (not cut off) is only found when it is read
+write_snapshot(snapshot_path, sections)
+with open(snapshot_path, "r+b") as f:
+    f.seek(full_size - 10)
+    f.write(b"\xff" * 10)
+snapshot = build_knowledge_snapshot()
+if snapshot.source == "website" and LIVE_TEXT.strip() in snapshot.text:
+    print(f"✓ section damaged: built live from {snapshot.source_name}")
+else:
+    failed += 1
+    print(f"✗ section damaged: source={snapshot.source}")
+
+print("-" * 50)
+print("All passed" if not failed else f"{failed} failed")
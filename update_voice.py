@@ -1,25 +1,120 @@
+"""
+Broadgate - Persona Voice Updater
+Bring the TTS settings of one or many personas in line with the configured
+voice. Current configs are fetched concurrently and only personas whose
+layers/tts differ are patched, so re-running is just a handful of reads.
 
-import os
+Usage:
+    python update_voice.py                      # BROADGATE_PERSONA_ID
+    python update_voice.py --persona p123 --persona p456
+    python update_voice.py --all --dry-run
+    python update_voice.py --all --engine cartesia --voice-id abc123 --concurrency 16
+"""
+
+import argparse
 import sys
 from config import BROADGATE_PERSONA_ID, TTS_ENGINE, BRITISH_VOICE_ID
-from utils.api import update_persona_voice
+from utils.api import list_personas, persona_voice_operations
+from utils.async_api import AsyncTavusAPI, run_sync
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update the voice of one or many personas")
+    parser.add_argument("--persona", action="append", dest="persona_ids", metavar="PERSONA_ID",
+                        help=f"Persona to update (repeatable, default: {BROADGATE_PERSONA_ID})")
+    parser.add_argument("--all", action="store_true", help="Update every persona on the account")
+    parser.add_argument("--engine", default=TTS_ENGINE, help="TTS engine (default: TTS_ENGINE)")
+    parser.add_argument("--voice-id", default=BRITISH_VOICE_ID, help="External voice ID (default: BRITISH_VOICE_ID)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without patching")
+    return parser.parse_args()
+
+
+async def sync_voices(personas: dict, tts_engine: str, voice_id: str, concurrency: int, dry_run: bool) -> list:
+    """
+    Diff and patch personas
+
+    Args:
+        personas: persona_id -> persona config, or None where it still has to be fetched
+
+    Returns:
+        One dict per persona with persona_id, name, status and changes
+    """
+    client = AsyncTavusAPI(max_concurrency=concurrency)
+
+    missing = [persona_id for persona_id, persona in personas.items() if persona is None]
+    if missing:
+        personas.update(await client.get_personas(missing))
+
+    results = []
+    patches = {}
+    for persona_id, persona in personas.items():
+        row = {"persona_id": persona_id, "name": "", "status": "", "changes": ""}
+        results.append(row)
+        if isinstance(persona, Exception):
+            row["status"], row["changes"] = "failed", f"fetch: {persona}"
+            continue
+
+        row["name"] = persona.get("persona_name") or ""
+        operations = persona_voice_operations(persona, tts_engine, voice_id)
+        if not operations:
+            row["status"] = "unchanged"
+            continue
+        row["changes"] = ", ".join(op["path"] for op in operations)
+        if dry_run:
+            row["status"] = "would update"
+        else:
+            patches[persona_id] = operations
+
+    if patches:
+        outcomes = await client.update_personas(patches)
+        for row in results:
+            if row["persona_id"] not in outcomes:
+                continue
+            outcome = outcomes[row["persona_id"]]
+            if isinstance(outcome, Exception):
+                row["status"], row["changes"] = "failed", f"patch: {outcome}"
+            else:
+                row["status"] = "updated"
+    return results
+
+
+def print_table(results: list):
+    columns = ("persona_id", "name", "status", "changes")
+    widths = {c: max([len(c)] + [len(str(r[c])) for r in results]) for c in columns}
+    print("  ".join(c.upper().ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in results:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
 
 def main():
-    print(f"Updating Persona: {BROADGATE_PERSONA_ID}")
-    print(f"TTS Engine: {TTS_ENGINE}")
-    print(f"Voice ID: {BRITISH_VOICE_ID}")
-    
-    if not BROADGATE_PERSONA_ID:
-        print("Error: BROADGATE_PERSONA_ID is not set.")
-        return
-
-    try:
-        response = update_persona_voice(BROADGATE_PERSONA_ID, TTS_ENGINE, BRITISH_VOICE_ID)
-        print("Success! Persona updated.")
-        print(response)
-    except Exception as e:
-        print(f"Error updating persona: {e}")
-        # If 'add' failed, maybe try 'replace' manually if needed, but let's see the error first.
+    args = parse_args()
+
+    print(f"TTS Engine: {args.engine}")
+    print(f"Voice ID: {args.voice_id}")
+
+    if args.all:
+        # List pages already carry each persona's config, so no per-persona reads are needed
+        personas = {p["persona_id"]: (p if "layers" in p else None) for p in list_personas() if p.get("persona_id")}
+    else:
+        persona_ids = args.persona_ids or ([BROADGATE_PERSONA_ID] if BROADGATE_PERSONA_ID else [])
+        if not persona_ids:
+            print("Error: BROADGATE_PERSONA_ID is not set.")
+            return
+        personas = dict.fromkeys(persona_ids)
+
+    print(f"Personas: {len(personas)}{' (dry run)' if args.dry_run else ''}\n")
+    results = run_sync(sync_voices(personas, args.engine, args.voice_id, args.concurrency, args.dry_run))
+    print_table(results)
+
+    counts = {}
+    for row in results:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    print("\n" + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if counts.get("failed"):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
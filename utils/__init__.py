@@ -28,12 +28,27 @@ from .extraction import (
     extract_transcript_text,
     extract_name,
     extract_email,
+    extract_lead_fields,
+    extract_new_info,
     extract_info_and_send_webhook
 )
 
+from .lead_extractor import (
+    ExtractionEngine,
+    FieldMatch,
+    build_engine
+)
+
+from .transcript import (
+    TranscriptBuffer,
+    fetch_new_messages
+)
+
 from .web_scraper import (
     scrape_website,
-    scrape_multiple_pages
+    scrape_page,
+    scrape_multiple_pages,
+    ScrapeResult
 )
 
 __all__ = [
@@ -59,9 +74,20 @@ __all__ = [
     'extract_transcript_text',
     'extract_name',
     'extract_email',
+    'extract_lead_fields',
+    'extract_new_info',
     'extract_info_and_send_webhook',
+    'ExtractionEngine',
+    'FieldMatch',
+    'build_engine',
+    
+    # Transcript functions
+    'TranscriptBuffer',
+    'fetch_new_messages',
     
     # Web scraper functions
     'scrape_website',
-    'scrape_multiple_pages'
+    'scrape_page',
+    'scrape_multiple_pages',
+    'ScrapeResult'
 ]
@@ -3,47 +3,84 @@ Broadgate - API Client
 Functions for interacting with the Tavus API
 """
 
-import requests
-from config import TAVUS_API_KEY
+import threading
+import time
+from config import NAME_INDEX_TTL
+from .metrics import get_api_metrics
+from .tavus_client import get_client
 
 
-def _headers():
-    """Get API headers with authentication"""
-    if not TAVUS_API_KEY:
-        raise ValueError("API_KEY missing. Please configure it in Streamlit Cloud secrets or .env file")
-    return {"x-api-key": TAVUS_API_KEY}
+class NameIndex:
+    """
+    Local name -> item index over a Tavus list endpoint.
+
+    The full (paginated) list is loaded once and then kept for ttl seconds,
+    so name lookups don't hit the API. Call invalidate() after creating or
+    renaming something so the next lookup reloads it.
+    """
+
+    def __init__(self, list_items, name_key: str, ttl: float = NAME_INDEX_TTL):
+        self.list_items = list_items
+        self.name_key = name_key
+        self.ttl = ttl
+        self._items = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Find an item by name, loading the index if it is missing or expired"""
+        with self._lock:
+            if self._items is None or time.monotonic() - self._loaded_at > self.ttl:
+                items = {}
+                for item in self.list_items():
+                    # Keep the first match, like the old linear scan did
+                    items.setdefault(item.get(self.name_key), item)
+                self._items = items
+                self._loaded_at = time.monotonic()
+            return self._items.get(name)
+
+    def invalidate(self):
+        """Drop the index so the next lookup reloads it"""
+        with self._lock:
+            self._items = None
 
 
 # ========== Documents ==========
 
+def list_documents():
+    """List all documents (every page)"""
+    return list(get_client().iter_list("/v2/documents", "documents.list"))
+
+
 def find_document_by_name(name: str):
     """Find a document by name"""
-    r = requests.get("https://tavusapi.com/v2/documents", headers=_headers())
-    r.raise_for_status()
-    for d in r.json().get("data", []):
-        if d.get("document_name") == name:
-            return d
-    return None
+    return document_index.get(name)
 
 
 def create_document_from_url(name: str, url: str):
     """Create a new document from a URL"""
     payload = {"document_name": name, "document_url": url}
-    r = requests.post("https://tavusapi.com/v2/documents", json=payload, headers=_headers())
-    r.raise_for_status()
+    r = get_client().post("/v2/documents", "documents.create", json=payload)
+    document_index.invalidate()
     return r.json()
 
 
 # ========== Personas ==========
 
+def list_personas():
+    """List all personas (every page)"""
+    return list(get_client().iter_list("/v2/personas", "personas.list"))
+
+
 def find_persona_by_name(name: str):
     """Find a persona by name"""
-    r = requests.get("https://tavusapi.com/v2/personas", headers=_headers())
-    r.raise_for_status()
-    for p in r.json().get("data", []):
-        if p.get("persona_name") == name:
-            return p
-    return None
+    return persona_index.get(name)
+
+
+def get_persona(persona_id: str):
+    """Get a single persona by ID"""
+    r = get_client().get(f"/v2/personas/{persona_id}", "personas.get")
+    return r.json()
 
 
 def create_persona(name: str, system_prompt: str, document_ids: list):
@@ -54,15 +91,16 @@ def create_persona(name: str, system_prompt: str, document_ids: list):
         "system_prompt": system_prompt,
         "document_ids": document_ids,
     }
-    r = requests.post("https://tavusapi.com/v2/personas", json=payload, headers=_headers())
-    r.raise_for_status()
+    r = get_client().post("/v2/personas", "personas.create", json=payload)
+    persona_index.invalidate()
     return r.json()
 
 
 def update_persona(persona_id: str, operations: list):
     """Update a persona using JSON Patch operations"""
-    r = requests.patch(f"https://tavusapi.com/v2/personas/{persona_id}", json=operations, headers=_headers())
-    r.raise_for_status()
+    r = get_client().patch(f"/v2/personas/{persona_id}", "personas.update", json=operations)
+    if any(op.get("path") == "/persona_name" for op in operations):
+        persona_index.invalidate()
     return r.json()
 
 
@@ -91,9 +129,40 @@ def update_persona_voice(persona_id: str, tts_engine: str, voice_id: str):
     return update_persona(persona_id, operations)
 
 
+def persona_voice_operations(persona: dict, tts_engine: str, voice_id: str) -> list:
+    """
+    JSON Patch operations that give a persona the desired TTS settings
+
+    Only fields that differ are touched, so an up-to-date persona gets an
+    empty list and needs no request at all. A value of None leaves that
+    field as it is.
+    """
+    desired = {"tts_engine": tts_engine, "external_voice_id": voice_id}
+    desired = {key: value for key, value in desired.items() if value is not None}
+    if not desired:
+        return []
+
+    layers = persona.get("layers")
+    if not isinstance(layers, dict):
+        return [{"op": "add", "path": "/layers", "value": {"tts": desired}}]
+    tts = layers.get("tts")
+    if not isinstance(tts, dict):
+        return [{"op": "add", "path": "/layers/tts", "value": desired}]
+
+    return [
+        {"op": "replace" if key in tts else "add", "path": f"/layers/tts/{key}", "value": value}
+        for key, value in desired.items()
+        if tts.get(key) != value
+    ]
+
+
+document_index = NameIndex(list_documents, "document_name")
+persona_index = NameIndex(list_personas, "persona_name")
+
+
 # ========== Conversations ==========
 
-def create_conversation(persona_id: str, replica_id: str = None, callback_url: str = None, test_mode: bool = False, custom_greeting: str = "Hello! I'm your AI assistant. How can I help you today?", context_text: str = None):
+def create_conversation(persona_id: str, replica_id: str = None, callback_url: str = None, test_mode: bool = False, custom_greeting: str = "Hello! I'm your AI assistant. How can I help you today?", context_text: str = None, max_context_bytes: int = None):
     """Create a new conversation with a persona
     
     Args:
@@ -103,12 +172,18 @@ def create_conversation(persona_id: str, replica_id: str = None, callback_url: s
         test_mode: If True, creates conversation without replica joining (no costs)
         custom_greeting: Initial message spoken by the AI
         context_text: Optional text to provide as context/knowledge base for the conversation
+        max_context_bytes: Size budget for context_text (defaults to config CONTEXT_MAX_BYTES, 0 = no limit)
     """
     from config import REPLICA_ID
+    from .context_budget import build_context
     
     if replica_id is None:
         replica_id = REPLICA_ID
     
+    if context_text:
+        context_text, report = build_context(context_text, max_bytes=max_context_bytes)
+        print(report.summary())
+    
     base_context = "Start the conversation by greeting the user and introducing yourself."
     if context_text:
         base_context += f"\n\nHere is some background information to help you answer questions:\n{context_text}"
@@ -124,18 +199,30 @@ def create_conversation(persona_id: str, replica_id: str = None, callback_url: s
     if test_mode:
         payload["test_mode"] = test_mode
     
-    r = requests.post("https://tavusapi.com/v2/conversations", json=payload, headers=_headers())
-    r.raise_for_status()
+    r = get_client().post("/v2/conversations", "conversations.create", json=payload)
     return r.json()
 
 
-def end_conversation(conv_id: str):
-    """End an active conversation"""
+def end_conversation(conv_id: str, process_transcript: bool = True):
+    """End an active conversation
+    
+    Args:
+        conv_id: Conversation ID
+        process_transcript: Queue the conversation for lead extraction, saving
+                            and the webhook (see utils/job_queue.py)
+    """
     if not conv_id:
         raise ValueError("conv_id required")
     
-    r = requests.post(f"https://tavusapi.com/v2/conversations/{conv_id}/end", headers=_headers())
-    r.raise_for_status()
+    # Ending an already-ended conversation is harmless, so this is safe to retry
+    r = get_client().post(f"/v2/conversations/{conv_id}/end", "conversations.end", idempotent=True)
+    
+    if process_transcript:
+        from .job_queue import enqueue_post_call
+        try:
+            enqueue_post_call(conv_id)
+        except Exception as e:
+            print(f"Could not queue post-call processing for {conv_id}: {e}")
     
     # Check if the response has content and is JSON before trying to parse
     if r.status_code == 200 and r.headers.get('Content-Type', '').startswith('application/json'):
@@ -144,16 +231,33 @@ def end_conversation(conv_id: str):
     return {"status": "success", "message": "Conversation ended"}
 
 
-def get_conversation_messages(conv_id: str):
-    """Get all messages from a conversation"""
+def get_conversation_messages(conv_id: str, after: str = None):
+    """Get messages from a conversation
+    
+    Args:
+        conv_id: Conversation ID
+        after: Only return messages after this message ID (servers that
+               don't support the cursor return every message; see
+               utils.transcript.TranscriptBuffer for the incremental API)
+    """
     if not conv_id:
         return []
     
-    r = requests.get(f"https://tavusapi.com/v2/conversations/{conv_id}/messages", headers=_headers())
+    params = {"after": after} if after else None
+    r = get_client().get(f"/v2/conversations/{conv_id}/messages", "conversations.messages", ok_statuses=(404,), params=params)
     
     if r.status_code == 404:
         return []
     
-    r.raise_for_status()
     data = r.json()
     return data.get("data", data if isinstance(data, list) else [])
+
+
+def get_api_stats():
+    """Rate limiter and request coalescing counters of the shared Tavus client, per endpoint class"""
+    return get_client().stats()
+
+
+def get_api_metrics_snapshot(reset: bool = False) -> dict:
+    """Per-endpoint latency, status, retry and payload-size histograms (enable with TAVUS_METRICS=true)"""
+    return get_api_metrics().snapshot(reset=reset)
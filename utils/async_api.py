@@ -0,0 +1,162 @@
+"""
+Broadgate - Async API Client
+Asyncio counterparts of the Tavus API functions, with bounded batch helpers
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import api
+from config import TAVUS_POOL_SIZE
+
+
+class AsyncTavusAPI:
+    """
+    Asyncio front end for the functions in utils.api.
+
+    Each call runs the matching synchronous function on a worker thread, so
+    both share the same pooled client, timeouts and retry/Retry-After
+    handling and cannot drift apart. Concurrency is capped (by default at the
+    connection pool size) and calls can additionally be spaced to stay under
+    a requests-per-second limit. The client owns max_concurrency worker
+    threads; asyncio's default executor would cap it at min(32, cpus + 4).
+    """
+
+    def __init__(self, max_concurrency: int = None, max_per_second: float = None):
+        self.max_concurrency = max_concurrency or TAVUS_POOL_SIZE
+        self.max_per_second = max_per_second
+        self._semaphore = None
+        self._rate_lock = None
+        self._loop = None
+        self._next_start = 0.0
+        self._executor = None
+
+    def _limits(self):
+        # Created lazily, and again for each new event loop (e.g. one run_sync per batch),
+        # since asyncio primitives are bound to the loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_lock = asyncio.Lock()
+            self._loop = loop
+        return self._semaphore, self._rate_lock
+
+    async def _pace(self, rate_lock: asyncio.Lock):
+        if not self.max_per_second:
+            return
+        async with rate_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + 1.0 / self.max_per_second
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def call(self, func, *args, **kwargs):
+        """Run a synchronous API function without blocking the event loop"""
+        semaphore, rate_lock = self._limits()
+        async with semaphore:
+            await self._pace(rate_lock)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="tavus-async")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        """Shut down the worker threads (a later call starts new ones)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ========== Documents ==========
+
+    async def list_documents(self):
+        return await self.call(api.list_documents)
+
+    async def find_document_by_name(self, name: str):
+        return await self.call(api.find_document_by_name, name)
+
+    async def create_document_from_url(self, name: str, url: str):
+        return await self.call(api.create_document_from_url, name, url)
+
+    # ========== Personas ==========
+
+    async def list_personas(self):
+        return await self.call(api.list_personas)
+
+    async def get_persona(self, persona_id: str):
+        return await self.call(api.get_persona, persona_id)
+
+    async def find_persona_by_name(self, name: str):
+        return await self.call(api.find_persona_by_name, name)
+
+    async def create_persona(self, name: str, system_prompt: str, document_ids: list):
+        return await self.call(api.create_persona, name, system_prompt, document_ids)
+
+    async def update_persona(self, persona_id: str, operations: list):
+        return await self.call(api.update_persona, persona_id, operations)
+
+    async def update_persona_voice(self, persona_id: str, tts_engine: str, voice_id: str):
+        return await self.call(api.update_persona_voice, persona_id, tts_engine, voice_id)
+
+    # ========== Conversations ==========
+
+    async def create_conversation(self, persona_id: str, **kwargs):
+        return await self.call(api.create_conversation, persona_id, **kwargs)
+
+    async def end_conversation(self, conv_id: str, **kwargs):
+        return await self.call(api.end_conversation, conv_id, **kwargs)
+
+    async def get_conversation_messages(self, conv_id: str, **kwargs):
+        return await self.call(api.get_conversation_messages, conv_id, **kwargs)
+
+    # ========== Batch operations ==========
+
+    async def end_conversations(self, conv_ids: list, **kwargs) -> dict:
+        """End many conversations (kwargs as for end_conversation); returns conv_id -> response or exception"""
+        results = await gather_bounded([self.end_conversation(c, **kwargs) for c in conv_ids], return_exceptions=True)
+        return dict(zip(conv_ids, results))
+
+    async def fetch_transcripts(self, conv_ids: list) -> dict:
+        """Fetch messages for many conversations; returns conv_id -> messages or exception"""
+        results = await gather_bounded([self.get_conversation_messages(c) for c in conv_ids], return_exceptions=True)
+        return dict(zip(conv_ids, results))
+
+    async def get_personas(self, persona_ids: list) -> dict:
+        """Fetch many personas; returns persona_id -> persona or exception"""
+        results = await gather_bounded([self.get_persona(p) for p in persona_ids], return_exceptions=True)
+        return dict(zip(persona_ids, results))
+
+    async def update_personas(self, operations_by_persona: dict) -> dict:
+        """Apply JSON Patch operations to many personas; returns persona_id -> response or exception"""
+        persona_ids = list(operations_by_persona)
+        results = await gather_bounded(
+            [self.update_persona(p, operations_by_persona[p]) for p in persona_ids], return_exceptions=True
+        )
+        return dict(zip(persona_ids, results))
+
+
+async def gather_bounded(aws, limit: int = None, return_exceptions: bool = False) -> list:
+    """
+    Like asyncio.gather, but with at most limit awaitables running at once
+
+    Results are returned in the same order as aws. Calls made through an
+    AsyncTavusAPI are already capped by its own limits; use limit to cap
+    other work or to go lower than the client's concurrency.
+    """
+    aws = list(aws)
+    if not limit:
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+def run_sync(coro):
+    """Run a coroutine from synchronous code (scripts, Streamlit callbacks)"""
+    return asyncio.run(coro)
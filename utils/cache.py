@@ -0,0 +1,61 @@
+"""
+Broadgate - Cache Module
+Small disk-backed key/value cache shared across processes
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+from config import CACHE_DIR
+
+
+class DiskCache:
+    """
+    JSON entries stored one file per key under a namespace directory.
+
+    Writes go to a temporary file and are moved into place with os.replace,
+    so readers in other processes never see a half-written entry.
+    """
+
+    def __init__(self, namespace: str, root: str = None):
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the stored entry for key, or None if missing or unreadable"""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, entry: dict):
+        """Atomically store entry for key"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, key: str):
+        """Remove the entry for key if present"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+def is_fresh(entry: dict, ttl: float) -> bool:
+    """Check whether a cache entry was stored less than ttl seconds ago"""
+    return time.time() - entry.get("stored_at", 0) < ttl
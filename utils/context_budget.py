@@ -0,0 +1,215 @@
+"""
+Broadgate - Context Budget Module
+Rank, deduplicate and cap knowledge text before it is sent to a conversation
+"""
+
+import re
+from dataclasses import dataclass
+from config import CONTEXT_MAX_BYTES, CONTEXT_PRIORITY_KEYWORDS
+from .web_scraper import split_pages
+
+
+# Lines that are never useful to the persona, whichever page they are on
+BOILERPLATE_PATTERNS = [
+    re.compile(r"\b(we use cookies|cookie (policy|settings|preferences)|accept (all )?cookies)\b", re.IGNORECASE),
+    re.compile(r"^(skip to (main )?content|back to top|all rights reserved.*|©.*)$", re.IGNORECASE),
+]
+
+# Rough size of a token for budgeting by tokens instead of bytes
+BYTES_PER_TOKEN = 4
+
+# Between page headers and sections in the assembled context
+SEPARATOR = "\n\n"
+
+
+@dataclass
+class ContextSection:
+    """A chunk of knowledge text with where it came from and its rank"""
+    source: str
+    text: str
+    order: int
+    score: float = 0.0
+    page: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode("utf-8"))
+
+
+@dataclass
+class ContextReport:
+    """How much of the knowledge text survived each stage of the budget"""
+    input_bytes: int = 0
+    output_bytes: int = 0
+    sections_total: int = 0
+    sections_kept: int = 0
+    boilerplate_bytes: int = 0
+    duplicate_bytes: int = 0
+    over_budget_bytes: int = 0
+
+    @property
+    def cut_bytes(self) -> int:
+        return self.input_bytes - self.output_bytes
+
+    @property
+    def formatting_bytes(self) -> int:
+        """
+        The rest of the cut: whitespace, and headers and separators around
+        removed boilerplate and duplicates. Negative when the separators
+        between sections split from one page add more than that removes
+        """
+        return self.cut_bytes - self.boilerplate_bytes - self.duplicate_bytes - self.over_budget_bytes
+
+    def summary(self) -> str:
+        percent = (self.cut_bytes / self.input_bytes * 100) if self.input_bytes else 0
+        return (
+            f"Context {self.input_bytes} -> {self.output_bytes} bytes ({percent:.0f}% cut): "
+            f"{self.sections_kept}/{self.sections_total} sections kept, "
+            f"{self.boilerplate_bytes} boilerplate, {self.duplicate_bytes} duplicate, "
+            f"{self.over_budget_bytes} over budget, {self.formatting_bytes} formatting"
+        )
+
+
+def split_sections(text: str, max_section_bytes: int = 1500) -> list:
+    """
+    Split knowledge text into sections of roughly max_section_bytes
+
+    Text in the scrape_multiple_pages format is split per page first; each
+    page (or the whole text, e.g. from a PDF) is then split on blank lines
+    and line breaks into chunks that stay under the section size.
+    """
+    sections = []
+    for page, (source, page_text) in enumerate(split_pages(text)):
+        chunk = []
+        chunk_size = 0
+        for line in page_text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            line_size = len(line.encode("utf-8")) + 1
+            if chunk and chunk_size + line_size > max_section_bytes:
+                sections.append(ContextSection(source, "\n".join(chunk), len(sections), page=page))
+                chunk, chunk_size = [], 0
+            chunk.append(line)
+            chunk_size += line_size
+        if chunk:
+            sections.append(ContextSection(source, "\n".join(chunk), len(sections), page=page))
+
+    return sections
+
+
+def _strip_boilerplate(sections: list, min_pages: int) -> int:
+    """Remove lines repeated across min_pages or more pages; returns bytes removed"""
+    pages_per_line = {}
+    for section in sections:
+        for line in set(section.text.splitlines()):
+            pages_per_line.setdefault(line.lower(), set()).add(section.source)
+
+    removed = 0
+    for section in sections:
+        kept = []
+        for line in section.text.splitlines():
+            repeated = len(pages_per_line[line.lower()]) >= min_pages
+            if repeated or any(p.search(line) for p in BOILERPLATE_PATTERNS):
+                removed += len(line.encode("utf-8")) + 1
+            else:
+                kept.append(line)
+        section.text = "\n".join(kept)
+    return removed
+
+
+def _page_header(source: str) -> str:
+    return f"=== Content from {source} ===" if source else ""
+
+
+def _assemble(sections: list) -> str:
+    """Join sections in their original order, with a header where each page starts"""
+    parts = []
+    previous_page = None
+    for section in sorted(sections, key=lambda s: s.order):
+        if section.source and section.page != previous_page:
+            parts.append(_page_header(section.source))
+        parts.append(section.text)
+        previous_page = section.page
+    return SEPARATOR.join(parts)
+
+
+def _score(section: ContextSection, priorities: dict) -> float:
+    """Sum the weights of every priority keyword found in the section or its source"""
+    haystack = f"{section.source}\n{section.text}".lower()
+    return sum(weight for keyword, weight in priorities.items() if keyword in haystack)
+
+
+def build_context(text: str, max_bytes: int = None, max_tokens: int = None, priorities: dict = None, min_pages_for_boilerplate: int = 3):
+    """
+    Assemble knowledge text that fits a size budget
+
+    Sections are stripped of cross-page boilerplate and exact duplicates,
+    ranked by priority keywords (earlier sections win ties), and packed
+    greedily into the budget. Kept sections are emitted in their original
+    order so the text still reads naturally.
+
+    Args:
+        text: Raw knowledge text (scraped pages or PDF text)
+        max_bytes: Size budget in UTF-8 bytes (defaults to config CONTEXT_MAX_BYTES, 0 = no limit)
+        max_tokens: Size budget in approximate tokens; overrides max_bytes
+        priorities: Keyword -> weight used to rank sections
+                    (defaults to config CONTEXT_PRIORITY_KEYWORDS, weight 1 each)
+        min_pages_for_boilerplate: Lines on at least this many pages count as boilerplate
+
+    Returns:
+        Tuple of (context text, ContextReport)
+    """
+    if max_tokens is not None:
+        max_bytes = max_tokens * BYTES_PER_TOKEN
+    elif max_bytes is None:
+        max_bytes = CONTEXT_MAX_BYTES
+    if priorities is None:
+        priorities = {keyword: 1 for keyword in CONTEXT_PRIORITY_KEYWORDS}
+    priorities = {keyword.lower(): weight for keyword, weight in priorities.items()}
+
+    report = ContextReport(input_bytes=len((text or "").encode("utf-8")))
+    if not text:
+        return "", report
+
+    sections = split_sections(text)
+    report.sections_total = len(sections)
+
+    if len({section.source for section in sections}) >= min_pages_for_boilerplate:
+        report.boilerplate_bytes = _strip_boilerplate(sections, min_pages_for_boilerplate)
+
+    unique = []
+    seen = set()
+    for section in sections:
+        key = section.text.lower()
+        if not key:
+            continue
+        if key in seen:
+            report.duplicate_bytes += section.size
+            continue
+        seen.add(key)
+        section.score = _score(section, priorities)
+        unique.append(section)
+
+    kept = []
+    started_pages = set()
+    separator_size = len(SEPARATOR)
+    used = -separator_size  # nothing goes before the first part
+    for section in sorted(unique, key=lambda s: (-s.score, s.order)):
+        # Every part is followed by a separator; the first kept section of a page also brings its header
+        cost = section.size + separator_size
+        if section.source and section.page not in started_pages:
+            cost += len(_page_header(section.source).encode("utf-8")) + separator_size
+        if max_bytes and used + cost > max_bytes:
+            continue
+        kept.append(section)
+        started_pages.add(section.page)
+        used += cost
+
+    context = _assemble(kept)
+    report.sections_kept = len(kept)
+    report.output_bytes = len(context.encode("utf-8"))
+    if len(kept) < len(unique):
+        # Everything the budget removed, including page headers and separators
+        report.over_budget_bytes = len(_assemble(unique).encode("utf-8")) - report.output_bytes
+    return context, report
@@ -0,0 +1,185 @@
+"""
+Broadgate - Conversation Pool Module
+Keeps conversations pre-created so the Start button doesn't wait on Tavus
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from config import (
+    BROADGATE_PERSONA_ID, REPLICA_ID, WEBHOOK_URL, DEFAULT_GREETING,
+    CONVERSATION_POOL_SIZE, CONVERSATION_POOL_MAX_AGE
+)
+from .api import create_conversation, end_conversation
+from .knowledge import get_knowledge_warmer
+
+
+@dataclass
+class PooledConversation:
+    """A conversation created ahead of time and waiting to be claimed"""
+    conversation_id: str
+    conversation_url: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ConversationPool:
+    """
+    Keeps up to size conversations ready for the default persona and replica.
+
+    A daemon thread tops the pool up after every claim and on a fixed
+    interval. Conversations older than max_age (which must be below the
+    Tavus timeout for an unjoined conversation) are ended and replaced, as
+    is everything left in the pool when the process exits.
+    """
+
+    def __init__(self, size: int, persona_id: str = BROADGATE_PERSONA_ID, replica_id: str = REPLICA_ID,
+                 callback_url: str = WEBHOOK_URL, custom_greeting: str = DEFAULT_GREETING,
+                 context_provider=None, max_age: float = CONVERSATION_POOL_MAX_AGE, refill_interval: float = 10.0):
+        self.size = size
+        self.persona_id = persona_id
+        self.replica_id = replica_id
+        self.callback_url = callback_url
+        self.custom_greeting = custom_greeting
+        self.context_provider = context_provider
+        self.max_age = max_age
+        self.refill_interval = refill_interval
+
+        self._ready = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counters = {"hits": 0, "misses": 0, "created": 0, "expired": 0, "create_errors": 0}
+
+    def start(self):
+        """Start the background refill loop (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="conversation-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain: bool = True):
+        """Stop refilling and, if drain, end every unclaimed conversation"""
+        self._stop.set()
+        self._wake.set()
+        if drain:
+            with self._lock:
+                leftovers = list(self._ready)
+                self._ready.clear()
+            for conversation in leftovers:
+                self._discard(conversation)
+
+    def claim(self):
+        """
+        Take a ready conversation out of the pool
+
+        Returns:
+            PooledConversation, or None if the pool is empty (the caller
+            should create a conversation synchronously)
+        """
+        now = time.monotonic()
+        claimed = None
+        expired = []
+        with self._lock:
+            while self._ready:
+                conversation = self._ready.popleft()
+                if now - conversation.created_at < self.max_age:
+                    claimed = conversation
+                    break
+                expired.append(conversation)
+            self._counters["hits" if claimed else "misses"] += 1
+            self._counters["expired"] += len(expired)
+
+        for conversation in expired:
+            self._discard(conversation)
+        self._wake.set()
+        return claimed
+
+    def stats(self) -> dict:
+        """Pool counters plus the hit rate of claim()"""
+        with self._lock:
+            stats = dict(self._counters, ready=len(self._ready), size=self.size)
+        claims = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / claims if claims else 0.0
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self._expire()
+                self._refill()
+            except Exception as e:
+                print(f"Conversation pool refill failed: {e}")
+            self._wake.wait(self.refill_interval)
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            fresh = deque(c for c in self._ready if now - c.created_at < self.max_age)
+            expired = [c for c in self._ready if now - c.created_at >= self.max_age]
+            self._ready = fresh
+            self._counters["expired"] += len(expired)
+        for conversation in expired:
+            self._discard(conversation)
+
+    def _refill(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._ready) >= self.size:
+                    return
+            context_text = self.context_provider() if self.context_provider else None
+            try:
+                result = create_conversation(
+                    persona_id=self.persona_id,
+                    replica_id=self.replica_id,
+                    callback_url=self.callback_url,
+                    custom_greeting=self.custom_greeting,
+                    context_text=context_text
+                )
+            except Exception as e:
+                with self._lock:
+                    self._counters["create_errors"] += 1
+                print(f"Could not pre-create conversation: {e}")
+                return
+            if not result.get("conversation_url"):
+                return
+            with self._lock:
+                self._ready.append(PooledConversation(result.get("conversation_id"), result["conversation_url"]))
+                self._counters["created"] += 1
+
+    def _discard(self, conversation: PooledConversation):
+        try:
+            # Never joined, so there is no transcript to process
+            end_conversation(conversation.conversation_id, process_transcript=False)
+        except Exception as e:
+            print(f"Could not end pooled conversation {conversation.conversation_id}: {e}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_conversation_pool():
+    """
+    Get the process-wide conversation pool, starting it on first use
+
+    Returns:
+        ConversationPool, or None when CONVERSATION_POOL_SIZE is 0 (disabled)
+    """
+    global _pool
+    if CONVERSATION_POOL_SIZE <= 0 or not BROADGATE_PERSONA_ID:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            def knowledge_text():
+                snapshot = get_knowledge_warmer().wait_ready(timeout=60)
+                return snapshot.text if snapshot else None
+
+            _pool = ConversationPool(CONVERSATION_POOL_SIZE, context_provider=knowledge_text)
+            _pool.start()
+            atexit.register(_pool.stop)
+    return _pool
@@ -0,0 +1,263 @@
+"""
+Broadgate - Site Crawler Module
+Incremental, sitemap-driven crawler for building a whole-site knowledge base
+"""
+
+import hashlib
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse, urldefrag
+import requests
+from .cache import DiskCache
+from .web_scraper import HEADERS, REASON_OK, REASON_NOT_MODIFIED, get_session, fetch_page, format_pages, html_to_text, _decode
+
+
+# Links to files we can't turn into page text
+SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".zip", ".mp3", ".mp4", ".mov", ".css", ".js", ".xml", ".json"
+)
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of a crawl: page text in discovery order plus what changed"""
+    pages: dict = field(default_factory=dict)   # url -> text (the last good copy for failed pages)
+    changed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+
+    def to_text(self) -> str:
+        """Combine pages in the scrape_multiple_pages output format"""
+        return format_pages(self.pages.items())
+
+
+class _LinkCollector(HTMLParser):
+    """Collects href targets from anchor tags"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+
+
+def _normalize_url(url: str) -> str:
+    """Strip fragments and make bare-host URLs end with a slash"""
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    if not parsed.path:
+        url = parsed._replace(path="/").geturl()
+    return url
+
+
+def _same_site_links(page_url: str, content: bytes, host: str) -> list:
+    """Return crawlable same-host links found in an HTML page"""
+    collector = _LinkCollector()
+    try:
+        collector.feed(_decode(content))
+        collector.close()
+    except Exception:
+        pass
+
+    links = []
+    for href in collector.links:
+        url = _normalize_url(urljoin(page_url, href))
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != host:
+            continue
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+        links.append(url)
+    return links
+
+
+def discover_sitemap_urls(root_url: str, session: requests.Session = None, max_sitemaps: int = 10) -> list:
+    """
+    Read page URLs from the site's sitemap.xml, following sitemap indexes
+
+    Args:
+        root_url: Any URL on the site
+        session: HTTP session to use (defaults to the shared pooled session)
+        max_sitemaps: Maximum number of sitemap files to read
+
+    Returns:
+        List of page URLs on the same host (empty if there is no sitemap)
+    """
+    session = session or get_session()
+    parsed = urlparse(root_url)
+    host = parsed.netloc
+    pending = [f"{parsed.scheme}://{host}/sitemap.xml"]
+    seen_sitemaps = set()
+    urls = []
+
+    while pending and len(seen_sitemaps) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen_sitemaps:
+            continue
+        seen_sitemaps.add(sitemap_url)
+
+        try:
+            response = session.get(sitemap_url, headers=HEADERS, timeout=10)
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+        except (requests.RequestException, ET.ParseError) as e:
+            print(f"Could not read sitemap {sitemap_url}: {e}")
+            continue
+
+        is_index = root.tag.endswith("sitemapindex")
+        for loc in root.iter():
+            if not loc.tag.endswith("loc") or not loc.text:
+                continue
+            url = _normalize_url(loc.text.strip())
+            if urlparse(url).netloc != host:
+                continue
+            if is_index:
+                pending.append(url)
+            else:
+                urls.append(url)
+
+    return urls
+
+
+class SiteCrawler:
+    """
+    Crawls one site and keeps a local index of every page it has seen.
+
+    The index stores a content hash, ETag/Last-Modified and the extracted
+    text and links per page. On refresh each page is revalidated with a
+    conditional GET; pages answering 304, or whose body hash is unchanged,
+    are served from the index without being parsed again. A page that fails
+    to load keeps its last good copy, in the index and in the crawl text.
+    """
+
+    def __init__(self, root_url: str, max_pages: int = 50, max_workers: int = 8, use_sitemap: bool = True):
+        self.root_url = _normalize_url(root_url)
+        self.host = urlparse(self.root_url).netloc
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.use_sitemap = use_sitemap
+        self._cache = DiskCache("crawl")
+
+    def load_index(self) -> dict:
+        """Get the stored page index for this site (url -> page entry)"""
+        stored = self._cache.get(self.root_url)
+        return stored.get("pages", {}) if stored else {}
+
+    def crawl(self) -> CrawlResult:
+        """Crawl the site, reprocessing only pages that changed since the last crawl"""
+        session = get_session()
+        old_index = self.load_index()
+        new_index = {}
+        result = CrawlResult()
+
+        seeds = [self.root_url]
+        if self.use_sitemap:
+            seeds += discover_sitemap_urls(self.root_url, session)
+
+        queued = set()
+        frontier = []
+        for url in seeds:
+            if url not in queued:
+                queued.add(url)
+                frontier.append(url)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while frontier and len(new_index) < self.max_pages:
+                batch = frontier[:self.max_pages - len(new_index)]
+                frontier = frontier[len(batch):]
+
+                fetched = executor.map(lambda u: self._fetch_page(session, u, old_index.get(u)), batch)
+
+                for url, (status, entry) in zip(batch, fetched):
+                    if entry is None:
+                        result.failed.append(url)
+                        # Keep the last good copy, so a passing error doesn't drop the page
+                        entry = old_index.get(url)
+                        if entry is None:
+                            continue
+
+                    new_index[url] = entry
+                    result.pages[url] = entry["text"]
+                    if status == "changed":
+                        result.changed.append(url)
+                    elif status == "unchanged":
+                        result.unchanged.append(url)
+
+                    for link in entry.get("links", []):
+                        if link not in queued:
+                            queued.add(link)
+                            frontier.append(link)
+
+        result.removed = [url for url in old_index if url not in new_index and url not in result.failed]
+
+        self._cache.set(self.root_url, {"root_url": self.root_url, "pages": new_index, "stored_at": time.time()})
+
+        print(f"Crawled {self.host}: {len(result.changed)} changed, {len(result.unchanged)} unchanged, "
+              f"{len(result.failed)} failed, {len(result.removed)} removed")
+        return result
+
+    def _fetch_page(self, session: requests.Session, url: str, previous: dict):
+        """Fetch one page; returns (status, entry) with status 'changed', 'unchanged' or 'failed'"""
+        headers = dict(HEADERS)
+        if previous:
+            if previous.get("etag"):
+                headers['If-None-Match'] = previous["etag"]
+            if previous.get("last_modified"):
+                headers['If-Modified-Since'] = previous["last_modified"]
+
+        fetched = fetch_page(url, headers, session, allowed_types=("text/html", "application/xhtml+xml"), parse=False, keep_body=True)
+
+        if fetched.reason == REASON_NOT_MODIFIED and previous:
+            return "unchanged", dict(previous, fetched_at=time.time())
+        if fetched.reason != REASON_OK:
+            print(f"Could not crawl {url}: {fetched.reason} {fetched.detail}")
+            return "failed", None
+
+        body_hash = hashlib.sha256(fetched.content).hexdigest()
+        meta = {
+            "etag": fetched.etag,
+            "last_modified": fetched.last_modified,
+            "fetched_at": time.time(),
+        }
+
+        if previous and previous.get("body_hash") == body_hash:
+            return "unchanged", dict(previous, **meta)
+
+        text = html_to_text(fetched.content)
+        entry = dict(
+            meta,
+            body_hash=body_hash,
+            content_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            text=text,
+            links=_same_site_links(url, fetched.content, self.host),
+        )
+
+        # Markup changed but the visible text didn't (e.g. a rotated nonce)
+        if previous and previous.get("content_hash") == entry["content_hash"]:
+            return "unchanged", entry
+
+        return "changed", entry
+
+
+def crawl_site(root_url: str, max_pages: int = 50, max_workers: int = 8) -> str:
+    """
+    Crawl a whole site and combine its pages into one knowledge base string
+
+    Args:
+        root_url: Home page of the site
+        max_pages: Maximum number of pages to include
+        max_workers: Maximum number of pages fetched at once
+
+    Returns:
+        Combined text content in the scrape_multiple_pages format
+    """
+    return SiteCrawler(root_url, max_pages=max_pages, max_workers=max_workers).crawl().to_text()
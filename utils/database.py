@@ -3,7 +3,9 @@ Broadgate - Database Module
 SQLite database operations for lead management
 """
 
+import json
 import sqlite3
+import time
 from datetime import datetime
 from config import DB_PATH
 
@@ -29,22 +31,96 @@ def init_db():
     if 'ts' not in cols:
         cur.execute("ALTER TABLE leads ADD COLUMN ts TEXT")
     
+    # Webhook deliveries, written with the lead they belong to (see utils/outbox.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conv_id TEXT,
+            url TEXT,
+            payload TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL,
+            last_error TEXT,
+            created_at TEXT,
+            delivered_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due ON webhook_outbox (status, next_attempt_at)")
+    
+    # Ended conversations waiting for lead extraction (see utils/job_queue.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS post_call_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conv_id TEXT UNIQUE,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_run_at REAL,
+            last_error TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            message_count INTEGER
+        )
+    """)
+    cur.execute("PRAGMA table_info(post_call_jobs)")
+    if 'message_count' not in [c[1] for c in cur.fetchall()]:
+        cur.execute("ALTER TABLE post_call_jobs ADD COLUMN message_count INTEGER")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_post_call_jobs_due ON post_call_jobs (status, next_run_at)")
+    
+    # Conversations already reprocessed by backfill_leads.py, per run
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            run TEXT,
+            conv_id TEXT,
+            ts TEXT,
+            PRIMARY KEY (run, conv_id)
+        )
+    """)
+    
     conn.commit()
     conn.close()
 
 
-def save_lead(conv_id: str, name: str = None, email: str = None):
-    """Save a lead to the database"""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+def save_lead(conv_id: str, name: str = None, email: str = None, webhook_url: str = None, webhook_payload: dict = None,
+              job_id: int = None) -> bool:
+    """Save a lead to the database
     
-    cur.execute(
-        "INSERT INTO leads (conv_id, name, email, ts) VALUES (?, ?, ?, ?)",
-        (conv_id, name, email, datetime.utcnow().isoformat())
-    )
+    With webhook_url and webhook_payload, the webhook delivery is added to
+    the outbox in the same transaction, so a saved lead is never left
+    without its webhook (see utils/outbox.py for delivery).
     
-    conn.commit()
-    conn.close()
+    With job_id, the post-call job is marked done in that transaction too,
+    and nothing is saved if it already was, so a job that runs twice (a
+    crashed worker, an expired lease) never saves a second lead.
+    
+    Returns:
+        True if the lead was saved, False if its job was already done
+    """
+    now = datetime.utcnow().isoformat()
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        with conn:
+            cur = conn.cursor()
+            if job_id is not None:
+                cur.execute(
+                    "UPDATE post_call_jobs SET status = 'done', updated_at = ? WHERE id = ? AND status != 'done'",
+                    (now, job_id)
+                )
+                if cur.rowcount == 0:
+                    return False
+            cur.execute(
+                "INSERT INTO leads (conv_id, name, email, ts) VALUES (?, ?, ?, ?)",
+                (conv_id, name, email, now)
+            )
+            if webhook_url and webhook_payload is not None:
+                cur.execute(
+                    "INSERT INTO webhook_outbox (conv_id, url, payload, status, attempts, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, 'pending', 0, ?, ?)",
+                    (conv_id, webhook_url, json.dumps(webhook_payload), time.time(), now)
+                )
+        return True
+    finally:
+        conn.close()
 
 
 def get_all_leads():
@@ -107,3 +183,68 @@ def get_leads_by_date_range(start_date: str = None, end_date: str = None):
         }
         for lead in leads
     ]
+
+
+def get_lead_conversation_ids():
+    """Get the distinct conversation IDs in the leads table, oldest first"""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    
+    cur.execute("SELECT conv_id FROM leads WHERE conv_id IS NOT NULL AND conv_id != '' GROUP BY conv_id ORDER BY MIN(id)")
+    conv_ids = [row[0] for row in cur.fetchall()]
+    
+    conn.close()
+    return conv_ids
+
+
+def get_backfilled_ids(run: str) -> set:
+    """Get the conversation IDs a backfill run has already processed"""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    
+    cur.execute("SELECT conv_id FROM backfill_progress WHERE run = ?", (run,))
+    done = {row[0] for row in cur.fetchall()}
+    
+    conn.close()
+    return done
+
+
+def reset_backfill(run: str):
+    """Forget a backfill run's progress so it starts from the beginning"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM backfill_progress WHERE run = ?", (run,))
+    conn.commit()
+    conn.close()
+
+
+def apply_lead_updates(run: str, updates: list, processed: list):
+    """
+    Write one batch of backfill results in a single transaction
+    
+    Args:
+        run: Backfill run name (for the checkpoint)
+        updates: List of (conv_id, name, email); existing leads get the new
+                 values where one was found, conversations without a lead get one
+        processed: Every conversation ID in the batch, recorded as done
+    """
+    now = datetime.utcnow().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            cur = conn.cursor()
+            for conv_id, name, email in updates:
+                cur.execute(
+                    "UPDATE leads SET name = COALESCE(?, name), email = COALESCE(?, email) WHERE conv_id = ?",
+                    (name, email, conv_id)
+                )
+                if cur.rowcount == 0:
+                    cur.execute(
+                        "INSERT INTO leads (conv_id, name, email, ts) VALUES (?, ?, ?, ?)",
+                        (conv_id, name, email, now)
+                    )
+            cur.executemany(
+                "INSERT OR REPLACE INTO backfill_progress (run, conv_id, ts) VALUES (?, ?, ?)",
+                [(run, conv_id, now) for conv_id in processed]
+            )
+    finally:
+        conn.close()
@@ -3,10 +3,13 @@ Broadgate - Data Extraction Module
 Extract information from conversation transcripts
 """
 
-import re
 from .api import get_conversation_messages
-from .webhook import send_to_webhook
+from config import WEBHOOK_URL
+from .webhook import build_webhook_payload
+from .outbox import notify_dispatcher
 from .database import save_lead
+from .transcript import message_text, get_transcript_buffer, drop_transcript_buffer
+from .lead_extractor import ExtractionEngine, default_engine
 
 
 def extract_transcript_text(conv_id: str) -> str:
@@ -19,78 +22,92 @@ def extract_transcript_text(conv_id: str) -> str:
     if not messages:
         return ""
     
-    transcript_parts = []
-    for msg in messages:
-        # Try different possible keys for message text
-        text = (
-            msg.get("text") or 
-            msg.get("content") or 
-            msg.get("message") or 
-            msg.get("transcript") or
-            ""
-        )
-        if text:
-            transcript_parts.append(str(text))
+    transcript_parts = [message_text(msg) for msg in messages]
     
-    return "\n".join(transcript_parts)
+    return "\n".join(part for part in transcript_parts if part)
 
 
 def extract_name(transcript_text: str) -> str:
-    """Extract name from transcript using regex patterns"""
+    """Extract name from transcript text (no speaker information; prefer extract_lead_fields)"""
     if not transcript_text:
         return None
     
-    # Pattern 1: "My name is [Name]"
-    pattern1 = re.search(r"(?:my name is|i'm|i am)\s+([a-zA-Z\s]+)", transcript_text, re.IGNORECASE)
-    if pattern1:
-        return pattern1.group(1).strip()
-    
-    # Pattern 2: "This is [Name]"
-    pattern2 = re.search(r"(?:this is|call me)\s+([a-zA-Z\s]+)", transcript_text, re.IGNORECASE)
-    if pattern2:
-        return pattern2.group(1).strip()
-    
-    return None
+    match = default_engine.extract([{"content": transcript_text}]).get("name")
+    return match.value if match else None
 
 
 def extract_email(transcript_text: str) -> str:
-    """Extract email from transcript using regex"""
+    """Extract email from transcript text (no speaker information; prefer extract_lead_fields)"""
     if not transcript_text:
         return None
     
-    email_match = re.search(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", transcript_text)
+    match = default_engine.extract([{"content": transcript_text}]).get("email")
+    return match.value if match else None
+
+
+def extract_lead_fields(messages: list, engine: ExtractionEngine = None) -> dict:
+    """
+    Extract lead fields from the user's turns of a conversation
     
-    if email_match:
-        return email_match.group(0)
+    Returns:
+        Dict of field -> FieldMatch (value, confidence, message_index)
+    """
+    return (engine or default_engine).extract(messages)
+
+
+def extract_new_info(conv_id: str, engine: ExtractionEngine = None) -> dict:
+    """
+    Fetch only the messages added since the last call and extract lead
+    fields from those alone. Safe to call repeatedly while a conversation
+    is live; fields already found with full confidence are not searched again.
     
-    return None
+    Returns:
+        Dict of field -> FieldMatch found so far
+    """
+    buffer = get_transcript_buffer(conv_id)
+    buffer.poll()
+    start, delta = buffer.unscanned()
+    if delta:
+        buffer.fields = (engine or default_engine).extract(delta, start_index=start, found=buffer.fields)
+    return dict(buffer.fields)
 
 
-def extract_info_and_send_webhook(conv_id: str):
+def extract_info_and_send_webhook(conv_id: str, job_id: int = None):
     """
     Extract name and email from conversation transcript,
-    then send to webhook and save to database
+    then save to database and queue the webhook
+    
+    job_id is the post-call job doing this (see utils/job_queue.py); it is
+    marked done together with the lead so a retried job saves nothing twice.
     """
     if not conv_id:
         print("No conversation ID provided for webhook processing.")
         return
     
-    # Extract transcript
-    transcript_text = extract_transcript_text(conv_id)
+    # Only messages not already seen by extract_new_info are fetched and scanned
+    info = extract_new_info(conv_id)
+    transcript_text = get_transcript_buffer(conv_id).text
+    drop_transcript_buffer(conv_id)
     
-    # Extract information
-    name = extract_name(transcript_text)
-    email = extract_email(transcript_text)
+    name = info["name"].value if "name" in info else None
+    email = info["email"].value if "email" in info else None
     
     print(f"Extracted from conversation {conv_id}:")
     print(f"  Name: {name or 'Not found'}")
     print(f"  Email: {email or 'Not found'}")
     
-    # Send to webhook
-    send_to_webhook(conv_id, name, email, transcript_text)
-    
-    # Save to database
-    save_lead(conv_id, name, email)
+    # Save to database; the webhook goes into the outbox in the same transaction
+    # and is delivered in the background, so a slow endpoint never holds this up
+    if WEBHOOK_URL:
+        saved = save_lead(conv_id, name, email, WEBHOOK_URL,
+                          build_webhook_payload(conv_id, name, email, transcript_text), job_id=job_id)
+        if saved:
+            notify_dispatcher()
+    else:
+        print("WEBHOOK_URL not configured, skipping webhook")
+        saved = save_lead(conv_id, name, email, job_id=job_id)
+    if not saved:
+        print(f"Lead for conversation {conv_id} was already saved by an earlier run of its job")
     
     return {
         "name": name,
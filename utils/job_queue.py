@@ -0,0 +1,234 @@
+"""
+Broadgate - Post-Call Job Queue
+Durable, SQLite-backed queue that turns ended conversations into leads
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from config import DB_PATH, POST_CALL_WORKERS, POST_CALL_MAX_ATTEMPTS, POST_CALL_POLL_INTERVAL
+from .extraction import extract_info_and_send_webhook
+from .transcript import get_transcript_buffer, drop_transcript_buffer
+
+
+# A claimed job whose worker died is handed out again after this many seconds
+LEASE_SECONDS = 300
+
+# Backoff between transcript checks: first retry after ~BACKOFF_BASE seconds, capped at BACKOFF_MAX
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 300.0
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")  # workers read while others write
+    return conn
+
+
+def enqueue_post_call(conv_id: str, delay: float = 0.0) -> bool:
+    """
+    Queue an ended conversation for lead processing
+
+    Args:
+        conv_id: Conversation ID
+        delay: Seconds before the first attempt (transcripts appear shortly after the call ends)
+
+    Returns:
+        True if queued, False if the conversation was already queued
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO post_call_jobs (conv_id, status, attempts, next_run_at, created_at) "
+            "VALUES (?, 'pending', 0, ?, ?)",
+            (conv_id, now + delay, datetime.utcnow().isoformat())
+        )
+        queued = cur.rowcount > 0
+    finally:
+        conn.close()
+    if queued and _workers is not None and not delay:
+        _workers.notify()
+    return queued
+
+
+def claim_job():
+    """
+    Atomically take the next due job (or one whose lease expired)
+
+    Returns:
+        (job_id, conv_id, attempts, message_count) or None if nothing is due
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id, conv_id, attempts, message_count FROM post_call_jobs "
+            "WHERE status IN ('pending', 'running') AND next_run_at <= ? "
+            "ORDER BY next_run_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row:
+            # While running, next_run_at doubles as the lease expiry
+            conn.execute(
+                "UPDATE post_call_jobs SET status = 'running', next_run_at = ? WHERE id = ?",
+                (now + LEASE_SECONDS, row[0])
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _finish(job_id: int, status: str, attempts: int, next_run_at: float = 0.0, error: str = None,
+            message_count: int = None):
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE post_call_jobs SET status = ?, attempts = ?, next_run_at = ?, last_error = ?, updated_at = ?, "
+            "message_count = COALESCE(?, message_count) WHERE id = ?",
+            (status, attempts, next_run_at, error, datetime.utcnow().isoformat(), message_count, job_id)
+        )
+    finally:
+        conn.close()
+
+
+def get_job_counts() -> dict:
+    """Number of jobs per status (pending, running, done, no_transcript, failed)"""
+    conn = _connect()
+    try:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM post_call_jobs GROUP BY status").fetchall())
+    finally:
+        conn.close()
+
+
+def _backoff(attempts: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+
+
+def process_job(job_id: int, conv_id: str, attempts: int, message_count: int = None,
+                max_attempts: int = POST_CALL_MAX_ATTEMPTS) -> str:
+    """
+    Run one attempt of a job and record the outcome
+
+    Tavus keeps writing the transcript for a while after the call ends, so
+    it only counts as ready once two polls, a backoff apart, see the same
+    number of messages (message_count is what the previous attempt saw).
+    Until then the job is rescheduled with exponential backoff. On the last
+    attempt a transcript that is still growing is used as it is, and one
+    that is still empty ends the job as no_transcript with no lead saved.
+
+    Returns:
+        The job's new status
+    """
+    attempts += 1
+    try:
+        buffer = get_transcript_buffer(conv_id)
+        buffer.poll()
+        if not buffer.messages:
+            if attempts >= max_attempts:
+                drop_transcript_buffer(conv_id)
+                _finish(job_id, "no_transcript", attempts, error="transcript still empty")
+                return "no_transcript"
+            _finish(job_id, "pending", attempts, time.time() + _backoff(attempts), "transcript not ready")
+            return "pending"
+        if len(buffer.messages) != message_count and attempts < max_attempts:
+            _finish(job_id, "pending", attempts, time.time() + _backoff(attempts), "transcript still growing",
+                    message_count=len(buffer.messages))
+            return "pending"
+
+        # The lead and the job's done status are written in one transaction
+        extract_info_and_send_webhook(conv_id, job_id=job_id)
+        _finish(job_id, "done", attempts)
+        return "done"
+    except Exception as e:
+        if attempts >= max_attempts:
+            _finish(job_id, "failed", attempts, error=str(e))
+            print(f"✗ Post-call processing failed for {conv_id} after {attempts} attempts: {e}")
+            return "failed"
+        _finish(job_id, "pending", attempts, time.time() + _backoff(attempts), str(e))
+        return "pending"
+
+
+class PostCallWorkers:
+    """
+    Daemon threads that drain the post-call queue.
+
+    Any number of processes can run workers against the same database
+    (see post_call_worker.py); claiming a job is a single write
+    transaction, so each job is handed to one worker at a time.
+    """
+
+    def __init__(self, threads: int = POST_CALL_WORKERS, poll_interval: float = POST_CALL_POLL_INTERVAL):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._workers = []
+
+    def start(self):
+        """Start the worker threads (no-op if already running)"""
+        if any(t.is_alive() for t in self._workers):
+            return
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"post-call-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for thread in self._workers:
+            thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake idle workers, e.g. right after enqueueing"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = claim_job()
+            except sqlite3.Error as e:
+                print(f"Post-call queue unavailable: {e}")
+                job = None
+            if job:
+                try:
+                    process_job(*job)
+                except sqlite3.Error as e:
+                    # The lease runs out and the job is retried
+                    print(f"Post-call queue unavailable: {e}")
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def get_post_call_workers():
+    """
+    Get the process-wide post-call workers, starting them on first use
+
+    Returns:
+        PostCallWorkers, or None when POST_CALL_WORKERS is 0 (jobs are then
+        left for a separate post_call_worker.py process)
+    """
+    global _workers
+    if POST_CALL_WORKERS <= 0:
+        return None
+    with _workers_lock:
+        if _workers is None:
+            _workers = PostCallWorkers()
+            _workers.start()
+    return _workers
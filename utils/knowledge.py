@@ -0,0 +1,183 @@
+"""
+Broadgate - Knowledge Module
+Background warmer that keeps the conversation knowledge base ready
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from config import KNOWLEDGE_URL, KNOWLEDGE_REFRESH_INTERVAL, KNOWLEDGE_CRAWL, KNOWLEDGE_MAX_PAGES, KNOWLEDGE_SNAPSHOT_PATH
+from .crawler import crawl_site
+from .knowledge_index import get_knowledge_index
+from .snapshot import SnapshotReader, SnapshotError
+from .web_scraper import scrape_page
+from .pdf_processor import extract_text_from_pdf, find_pdf_in_dir
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """An immutable, fully built knowledge base ready to hand to a conversation"""
+    text: Optional[str]
+    source: Optional[str] = None       # "website", "PDF", "documents" or None
+    source_name: Optional[str] = None  # URL or document file name(s)
+    errors: tuple = ()
+    built_at: float = field(default_factory=time.time)
+
+
+def load_knowledge_snapshot(path: str = KNOWLEDGE_SNAPSHOT_PATH) -> KnowledgeSnapshot:
+    """
+    Load the knowledge base from a prebuilt snapshot file (see build_knowledge.py)
+    
+    Website sections are used when present; document sections are only
+    decompressed if there are none.
+    """
+    with SnapshotReader(path) as reader:
+        website = reader.section_names("website")
+        documents = reader.section_names("document")
+        if website:
+            text = reader.combined_text("website") if len(website) > 1 else reader.section(website[0])
+            return KnowledgeSnapshot(text, "website", website[0])
+        if documents:
+            text = reader.combined_text("document") if len(documents) > 1 else reader.section(documents[0])
+            source = "PDF" if len(documents) == 1 and documents[0].lower().endswith(".pdf") else "documents"
+            return KnowledgeSnapshot(text, source, ", ".join(documents))
+    return KnowledgeSnapshot(None, errors=(f"Knowledge snapshot {path} has no sections",))
+
+
+def build_knowledge_snapshot(url: str = KNOWLEDGE_URL) -> KnowledgeSnapshot:
+    """
+    Build the knowledge base text from the prebuilt snapshot file if there is
+    one; otherwise from the website, falling back to the knowledge directory
+    documents and then to any PDF next to the app.
+    
+    Args:
+        url: Website to scrape as the primary knowledge source
+        
+    Returns:
+        KnowledgeSnapshot with the text and where it came from
+    """
+    if os.path.exists(KNOWLEDGE_SNAPSHOT_PATH):
+        try:
+            snapshot = load_knowledge_snapshot(KNOWLEDGE_SNAPSHOT_PATH)
+            if snapshot.text:
+                return snapshot
+        except (OSError, SnapshotError) as e:
+            print(f"Could not load knowledge snapshot, building live: {e}")
+    
+    context_text = None
+    source = None
+    source_name = None
+    errors = []
+    
+    # Primary: Try website scraping (whole site when crawling is enabled)
+    try:
+        if KNOWLEDGE_CRAWL:
+            context_text = crawl_site(url, max_pages=KNOWLEDGE_MAX_PAGES)
+        else:
+            page = scrape_page(url)
+            context_text = page.text
+            if not page.ok:
+                errors.append(f"Could not load website: {page.reason} {page.detail}".strip())
+        if context_text and len(context_text) > 100:
+            source = "website"
+            source_name = url
+    except Exception as e:
+        errors.append(f"Could not load website: {e}")
+    
+    # Fallback: documents in the knowledge directory if website failed
+    if not context_text:
+        try:
+            index = get_knowledge_index()
+            context_text = index.merged_text()
+            documents = [d for d in index.documents() if d.text]
+            if context_text:
+                source = "PDF" if len(documents) == 1 and documents[0].name.lower().endswith(".pdf") else "documents"
+                source_name = ", ".join(d.name for d in documents)
+        except Exception as e:
+            errors.append(f"Could not load knowledge documents: {e}")
+    
+    # Last resort: any PDF next to the app
+    if not context_text:
+        pdf_path = find_pdf_in_dir(".")
+        
+        if pdf_path:
+            try:
+                context_text = extract_text_from_pdf(pdf_path)
+                source = "PDF"
+                source_name = os.path.basename(pdf_path)
+            except Exception as e:
+                errors.append(f"Could not load PDF: {e}")
+    
+    return KnowledgeSnapshot(context_text, source, source_name, tuple(errors))
+
+
+class KnowledgeWarmer:
+    """
+    Rebuilds the knowledge snapshot in a daemon thread on a fixed interval.
+    
+    Each rebuild produces a new immutable KnowledgeSnapshot which replaces
+    the previous one in a single reference assignment, so readers always see
+    either the old or the new snapshot and never a partial one.
+    """
+
+    def __init__(self, interval: int = KNOWLEDGE_REFRESH_INTERVAL, url: str = KNOWLEDGE_URL):
+        self.interval = interval
+        self.url = url
+        self._snapshot = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._refresh_lock = threading.Lock()
+
+    def start(self):
+        """Start the background refresh loop (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="knowledge-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the refresh loop to exit after the current build"""
+        self._stop.set()
+
+    def refresh(self) -> KnowledgeSnapshot:
+        """Build a new snapshot now and publish it"""
+        with self._refresh_lock:
+            snapshot = build_knowledge_snapshot(self.url)
+            self._snapshot = snapshot
+            self._ready.set()
+        return snapshot
+
+    def snapshot(self) -> Optional[KnowledgeSnapshot]:
+        """Get the latest published snapshot, or None before the first build finishes"""
+        return self._snapshot
+
+    def wait_ready(self, timeout: float = None) -> Optional[KnowledgeSnapshot]:
+        """Block until the first snapshot is published (or timeout) and return it"""
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Knowledge refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def get_knowledge_warmer() -> KnowledgeWarmer:
+    """Get the process-wide knowledge warmer, starting it on first use"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = KnowledgeWarmer()
+            _warmer.start()
+    return _warmer
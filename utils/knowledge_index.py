@@ -0,0 +1,191 @@
+"""
+Broadgate - Knowledge Index Module
+Incrementally maintained index of every document in the knowledge directory
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from config import KNOWLEDGE_DIR, KNOWLEDGE_PDF_PATH, PDF_WORKERS
+from .pdf_processor import extract_text_from_pdf
+from .web_scraper import format_pages
+
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".markdown")
+
+
+@dataclass(frozen=True)
+class KnowledgeDocument:
+    """One indexed file and its extracted text"""
+    path: str
+    name: str
+    mtime_ns: int
+    size: int
+    text: str
+
+
+def load_document_text(path: str) -> str:
+    """Extract the text of a supported knowledge document"""
+    if path.lower().endswith(".pdf"):
+        # Each document gets its own process; don't fan out again inside it
+        return extract_text_from_pdf(path, workers=1)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().strip()
+
+
+class KnowledgeIndex:
+    """
+    Keeps the extracted text of every document under a directory.
+
+    refresh() does a cheap stat sweep (at most once per sweep_interval) and
+    only re-extracts files whose mtime or size changed, in a process pool.
+    When the optional watchdog package is installed, start_watching() makes
+    file changes trigger the next sweep immediately instead of waiting for
+    the interval.
+    """
+
+    def __init__(self, directory: str = KNOWLEDGE_DIR, max_workers: int = None, sweep_interval: float = 5.0):
+        self.directory = directory
+        self.max_workers = max_workers or max(1, PDF_WORKERS)
+        self.sweep_interval = sweep_interval
+        self._documents = {}  # path -> KnowledgeDocument
+        self._merged = None
+        self._last_sweep = 0.0
+        self._dirty = threading.Event()
+        self._dirty.set()
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def _scan(self) -> dict:
+        """Stat every supported file under the directory: path -> (mtime_ns, size)"""
+        found = {}
+        if not os.path.isdir(self.directory):
+            return found
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        Bring the index up to date with the directory
+
+        Args:
+            force: Sweep even if the last sweep was recent and nothing was reported changed
+
+        Returns:
+            Dict with lists of 'added', 'updated' and 'removed' paths
+        """
+        changes = {"added": [], "updated": [], "removed": []}
+        with self._lock:
+            now = time.monotonic()
+            if not force and not self._dirty.is_set() and now - self._last_sweep < self.sweep_interval:
+                return changes
+            self._dirty.clear()
+            self._last_sweep = now
+
+            found = self._scan()
+            stale = [
+                path for path, (mtime_ns, size) in found.items()
+                if path not in self._documents
+                or (self._documents[path].mtime_ns, self._documents[path].size) != (mtime_ns, size)
+            ]
+            changes["removed"] = [path for path in self._documents if path not in found]
+
+            for path in changes["removed"]:
+                del self._documents[path]
+
+            if stale:
+                texts = self._extract_all(stale)
+                for path, text in zip(stale, texts):
+                    changes["updated" if path in self._documents else "added"].append(path)
+                    mtime_ns, size = found[path]
+                    self._documents[path] = KnowledgeDocument(path, os.path.basename(path), mtime_ns, size, text)
+
+            if stale or changes["removed"]:
+                self._merged = None
+        return changes
+
+    def _extract_all(self, paths: list) -> list:
+        if self.max_workers <= 1 or len(paths) == 1:
+            return [_safe_load_document(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            return list(executor.map(_safe_load_document, paths))
+
+    def documents(self) -> list:
+        """Indexed documents, the configured primary PDF first and the rest by name"""
+        primary = os.path.abspath(KNOWLEDGE_PDF_PATH)
+        return sorted(
+            self._documents.values(),
+            key=lambda d: (os.path.abspath(d.path) != primary, d.name.lower(), d.path)
+        )
+
+    def merged_text(self) -> str:
+        """
+        Combined text of all non-empty documents
+
+        A single document is returned as-is; several are combined in the
+        scrape_multiple_pages format with one section per file.
+        """
+        self.refresh()
+        with self._lock:
+            if self._merged is None:
+                documents = [d for d in self.documents() if d.text]
+                if len(documents) == 1:
+                    self._merged = documents[0].text
+                else:
+                    self._merged = format_pages((d.name, d.text) for d in documents)
+            return self._merged
+
+    def start_watching(self) -> bool:
+        """Mark the index dirty on file changes; returns False if watchdog isn't installed"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+        if self._observer or not os.path.isdir(self.directory):
+            return self._observer is not None
+
+        dirty = self._dirty
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                dirty.set()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), self.directory, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        return True
+
+
+def _safe_load_document(path: str) -> str:
+    try:
+        return load_document_text(path)
+    except Exception as e:
+        print(f"Could not load knowledge document {path}: {e}")
+        return ""
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Get the process-wide index of the knowledge directory"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = KnowledgeIndex()
+            _index.start_watching()
+    return _index
@@ -0,0 +1,171 @@
+"""
+Broadgate - Lead Extraction Engine
+Single-pass, speaker-aware extraction of lead fields from conversation messages
+"""
+
+import re
+from dataclasses import dataclass
+from .transcript import message_text
+
+
+# Name words: the first may be lower case after "my name is"; later ones must
+# be capitalised so the match stops at "and I'd like...". A name is never
+# taken from the start of an email address ("my name is john.smith@...")
+_NOT_EMAIL = r"(?![\w.%+-]*@)"
+_NAME = r"([A-Za-z][A-Za-z'-]+(?:\s+[A-Z][A-Za-z'-]+){0,2})" + _NOT_EMAIL
+_CAPITALISED_NAME = r"([A-Z][A-Za-z'-]+(?:\s+[A-Z][A-Za-z'-]+){0,2})" + _NOT_EMAIL
+
+# field -> [(pattern, confidence)]; group 1 of each pattern is the value
+FIELD_PATTERNS = {
+    "name": [
+        (r"(?i:\bmy name is|\bmy name's)\s+" + _NAME, 0.9),
+        (r"(?i:\bcall me|\bthis is)\s+" + _CAPITALISED_NAME, 0.7),
+        (r"(?i:\bi'm|\bi am)\s+" + _CAPITALISED_NAME, 0.5),
+    ],
+    "email": [
+        (r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", 0.95),
+    ],
+    "phone": [
+        (r"(?i:phone|number|mobile|call me on)\D{0,20}((?:\+|00)?\d[\d\s().-]{8,}\d)", 0.9),
+        (r"((?:\+44\s?|0)7\d{3}\s?\d{3}\s?\d{3})", 0.8),
+    ],
+    "company": [
+        (r"(?i:\bi work (?:at|for)|\bmy company is|\bcalling from|\bi'm from|\bi am from)\s+"
+         r"([A-Z][\w&'-]*(?:\s+[A-Z][\w&'-]*){0,3})", 0.7),
+    ],
+}
+
+# Words the name patterns catch that aren't names ("I'm Interested", "This is Great")
+NOT_NAMES = {"interested", "looking", "just", "great", "good", "fine", "here", "calling", "not", "sure", "from"}
+
+
+@dataclass(frozen=True)
+class FieldMatch:
+    """A value found for one field, how sure the pattern is and where it was found"""
+    field: str
+    value: str
+    confidence: float
+    message_index: int
+
+
+def _clean_name(value: str):
+    words = value.split()
+    while words and words[-1].lower() in NOT_NAMES:
+        words.pop()
+    if not words or words[0].lower() in NOT_NAMES:
+        return None
+    return " ".join(words)
+
+
+class ExtractionEngine:
+    """
+    Extracts fields from a list of messages in one pass.
+
+    Each field's patterns are compiled into a single alternation, so a
+    message is scanned once per field however many patterns a field has.
+    Fields are scanned separately so one field's match can never consume
+    the start of another's value ("my name is john.smith@example.com"). Only
+    messages from the given roles are read (messages without a role are read
+    too), and scanning stops as soon as every field has a match at its best
+    possible confidence.
+    """
+
+    def __init__(self, roles: tuple = ("user",)):
+        self.roles = roles
+        self._rules = []    # (field, pattern, confidence) per pattern, in registration order
+        self._cleaners = {}
+        self._best = {}     # field -> highest confidence any of its patterns gives
+        self._regexes = None
+
+    @property
+    def fields(self) -> list:
+        return list(self._best)
+
+    def register(self, field: str, patterns: list, clean=None):
+        """
+        Add a field
+
+        Args:
+            field: Field name, e.g. "phone"
+            patterns: List of (regex, confidence); group 1 of each regex is the value
+            clean: Optional function to tidy a value, returning None to reject it
+        """
+        for pattern, confidence in patterns:
+            self._rules.append((field, pattern, confidence))
+            self._best[field] = max(self._best.get(field, 0.0), confidence)
+        if clean:
+            self._cleaners[field] = clean
+        self._regexes = None
+        return self
+
+    def _compiled(self) -> dict:
+        """field -> (alternation of its patterns, {outer group: (confidence, value group)})"""
+        if self._regexes is None:
+            # Each rule becomes an outer group followed by its own groups;
+            # remember where each rule's value group ends up
+            parts, groups, used = {}, {}, {}  # used: groups taken so far in each field's alternation
+            for field, pattern, confidence in self._rules:
+                index = used.get(field, 0) + 1
+                parts.setdefault(field, []).append(pattern)
+                groups.setdefault(field, {})[index] = (confidence, index + 1)
+                used[field] = index + re.compile(pattern).groups
+            self._regexes = {
+                field: (re.compile("|".join(f"({p})" for p in patterns)), groups[field])
+                for field, patterns in parts.items()
+            }
+        return self._regexes
+
+    def extract(self, messages: list, start_index: int = 0, found: dict = None) -> dict:
+        """
+        Find every registered field in a list of messages
+
+        Args:
+            messages: Tavus message dicts, in conversation order
+            start_index: Index of messages[0] in the whole conversation (for incremental use)
+            found: Matches from earlier calls; only improved upon, never lost
+
+        Returns:
+            Dict of field -> FieldMatch (fields with no match are left out)
+        """
+        regexes = self._compiled()
+        found = dict(found or {})
+        pending = {f for f in self._best if f not in found or found[f].confidence < self._best[f]}
+
+        for offset, msg in enumerate(messages):
+            if not pending:
+                break
+            role = msg.get("role")
+            if role is not None and role not in self.roles:
+                continue
+            text = message_text(msg)
+            if not text:
+                continue
+
+            for field in [f for f in self._best if f in pending]:
+                regex, groups = regexes[field]
+                for match in regex.finditer(text):
+                    confidence, value_group = groups[match.lastindex]
+                    current = found.get(field)
+                    if current and current.confidence >= confidence:
+                        continue
+                    value = match.group(value_group).strip()
+                    clean = self._cleaners.get(field)
+                    value = clean(value) if clean else value
+                    if not value:
+                        continue
+                    found[field] = FieldMatch(field, value, confidence, start_index + offset)
+                    if confidence >= self._best[field]:
+                        pending.discard(field)
+                        break
+        return found
+
+
+def build_engine(fields: tuple = ("name", "email"), roles: tuple = ("user",)) -> ExtractionEngine:
+    """Engine with some of the built-in FIELD_PATTERNS (name, email, phone, company)"""
+    engine = ExtractionEngine(roles)
+    for field in fields:
+        engine.register(field, FIELD_PATTERNS[field], clean=_clean_name if field == "name" else None)
+    return engine
+
+
+default_engine = build_engine()
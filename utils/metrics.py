@@ -0,0 +1,204 @@
+"""
+Broadgate - API Metrics Module
+In-process latency, error and payload-size histograms for Tavus calls
+"""
+
+import bisect
+import threading
+import time
+from config import TAVUS_METRICS, TAVUS_METRICS_INTERVAL
+
+
+# Bucket upper bounds; values above the last bound go in an overflow bucket
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    __slots__ = ("bounds", "buckets", "count", "total", "min", "max")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile (max for the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": dict(zip([*map(str, self.bounds), "+Inf"], self.buckets)),
+        }
+
+
+class EndpointMetrics:
+    """Everything recorded for one endpoint"""
+
+    __slots__ = ("calls", "errors", "retries", "statuses", "duration_ms", "request_bytes", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = {}
+        self.duration_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.request_bytes = Histogram(SIZE_BUCKETS_BYTES)
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "duration_ms": self.duration_ms.to_dict(),
+            "request_bytes": self.request_bytes.to_dict(),
+            "response_bytes": self.response_bytes.to_dict(),
+        }
+
+
+class ApiMetrics:
+    """
+    Per-endpoint call metrics.
+
+    The client checks enabled before timing anything, so a disabled instance
+    costs one attribute lookup per call. Hooks receive a snapshot (and the
+    counters are reset) on every flush(), which start_forwarding() calls on
+    a daemon thread every interval seconds.
+    """
+
+    def __init__(self, enabled: bool = TAVUS_METRICS):
+        self.enabled = enabled
+        self._endpoints = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+        self._since = time.time()
+        self._forwarder = None
+        self._stop = threading.Event()
+
+    def record(self, endpoint: str, status, duration: float, retries: int = 0,
+               request_bytes: int = 0, response_bytes: int = 0):
+        """
+        Record one call
+
+        Args:
+            endpoint: Endpoint name, e.g. "personas.get"
+            status: HTTP status code, or the exception name if no response arrived
+            duration: Seconds, including retries, backoff and rate-limit waits
+            retries: Attempts after the first
+            request_bytes: Size of the request body
+            response_bytes: Size of the response body
+        """
+        key = endpoint or "other"
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = EndpointMetrics()
+            metrics.calls += 1
+            if not isinstance(status, int) or status >= 400:
+                metrics.errors += 1
+            metrics.retries += retries
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.duration_ms.observe(duration * 1000)
+            metrics.request_bytes.observe(request_bytes)
+            metrics.response_bytes.observe(response_bytes)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Current metrics as plain data
+
+        Returns:
+            Dict with 'since' and 'until' (Unix times) and 'endpoints':
+            endpoint -> calls, errors, error_rate, retries, statuses and the
+            duration_ms / request_bytes / response_bytes histograms
+        """
+        with self._lock:
+            now = time.time()
+            snapshot = {
+                "since": self._since,
+                "until": now,
+                "endpoints": {name: m.to_dict() for name, m in sorted(self._endpoints.items())},
+            }
+            if reset:
+                self._endpoints = {}
+                self._since = now
+        return snapshot
+
+    def reset(self):
+        """Clear every counter and histogram"""
+        self.snapshot(reset=True)
+
+    def add_hook(self, hook):
+        """Call hook(snapshot) on every flush, e.g. to forward to a metrics pipeline"""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def flush(self) -> dict:
+        """Hand a snapshot to every hook and start counting afresh"""
+        snapshot = self.snapshot(reset=True)
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(snapshot)
+            except Exception as e:
+                print(f"Metrics hook failed: {e}")
+        return snapshot
+
+    def start_forwarding(self, interval: float = TAVUS_METRICS_INTERVAL):
+        """Flush to the hooks every interval seconds on a daemon thread"""
+        if self._forwarder and self._forwarder.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._forwarder = threading.Thread(target=run, name="api-metrics", daemon=True)
+        self._forwarder.start()
+
+    def stop_forwarding(self):
+        self._stop.set()
+
+
+_metrics = ApiMetrics()
+
+
+def get_api_metrics() -> ApiMetrics:
+    """Get the process-wide Tavus call metrics (disabled unless TAVUS_METRICS=true)"""
+    return _metrics
@@ -0,0 +1,335 @@
+"""
+Broadgate - Webhook Outbox Module
+Background delivery of queued webhook payloads with retries and dead-lettering
+"""
+
+import gzip
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    DB_PATH, WEBHOOK_WORKERS, WEBHOOK_MAX_ATTEMPTS, WEBHOOK_TIMEOUT,
+    WEBHOOK_BATCH_SIZE, WEBHOOK_BATCH_MAX_BYTES, WEBHOOK_BATCH_MAX_DELAY
+)
+from .metrics import Histogram, LATENCY_BUCKETS_MS
+
+
+# A claimed delivery whose dispatcher died is retried after this many seconds
+LEASE_SECONDS = 120
+
+# Backoff between attempts: ~BACKOFF_BASE seconds after the first failure, capped at BACKOFF_MAX
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 3600.0
+
+CLAIM_BATCH = 10
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def claim_deliveries(limit: int = CLAIM_BATCH) -> list:
+    """
+    Atomically take up to limit due deliveries (or ones whose lease expired)
+
+    Returns:
+        List of (id, url, payload_json, attempts)
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT id, url, payload, attempts FROM webhook_outbox "
+            "WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at LIMIT ?",
+            (now, limit)
+        ).fetchall()
+        if rows:
+            # While sending, next_attempt_at doubles as the lease expiry
+            conn.executemany(
+                "UPDATE webhook_outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, row[0]) for row in rows]
+            )
+        conn.execute("COMMIT")
+        return rows
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def claim_batch(max_items: int, max_bytes: int, max_delay: float):
+    """
+    Atomically take a batch of due deliveries for one URL, once it is worth sending
+
+    A batch is claimed when max_items deliveries or max_bytes of payload are
+    waiting, or when the oldest has waited max_delay seconds.
+
+    Returns:
+        (rows, wait): rows is a list of (id, url, payload_json, attempts),
+        empty if nothing should be sent yet; wait is the seconds until the
+        oldest waiting delivery reaches max_delay (None if nothing is waiting)
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        candidates = conn.execute(
+            "SELECT id, url, payload, attempts, next_attempt_at FROM webhook_outbox "
+            "WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at LIMIT ?",
+            (now, max_items * 4)
+        ).fetchall()
+
+        rows, size = [], 0
+        for row in candidates:
+            if row[1] != candidates[0][1]:
+                continue
+            rows.append(row[:4])
+            size += len(row[2])
+            if len(rows) >= max_items or size >= max_bytes:
+                break
+
+        # next_attempt_at is when a delivery became due, so its age is how long it has waited
+        waited = now - candidates[0][4] if candidates else 0.0
+        full = len(rows) >= max_items or size >= max_bytes
+        if not rows or not (full or waited >= max_delay):
+            conn.execute("COMMIT")
+            return [], (max_delay - waited if candidates else None)
+
+        conn.executemany(
+            "UPDATE webhook_outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+            [(now + LEASE_SECONDS, row[0]) for row in rows]
+        )
+        conn.execute("COMMIT")
+        return rows, None
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def encode_batch(rows: list) -> bytes:
+    """Gzip-compressed JSON lines, one payload per line with its delivery_id added"""
+    lines = []
+    for delivery_id, _url, payload, _attempts in rows:
+        event = json.loads(payload)
+        event["delivery_id"] = delivery_id
+        lines.append(json.dumps(event, separators=(",", ":")))
+    return gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def _record(delivery_id: int, status: str, attempts: int, next_attempt_at: float = 0.0, error: str = None):
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE webhook_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, delivered_at = ? "
+            "WHERE id = ?",
+            (status, attempts, next_attempt_at, error,
+             datetime.utcnow().isoformat() if status == "delivered" else None, delivery_id)
+        )
+    finally:
+        conn.close()
+
+
+def get_outbox_counts() -> dict:
+    """Number of deliveries per status (pending, sending, delivered, dead)"""
+    conn = _connect()
+    try:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM webhook_outbox GROUP BY status").fetchall())
+    finally:
+        conn.close()
+
+
+def requeue_dead() -> int:
+    """Give every dead-lettered delivery a fresh set of attempts; returns how many"""
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "UPDATE webhook_outbox SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'dead'"
+        )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def _backoff(attempts: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+
+
+class WebhookDispatcher:
+    """
+    Daemon threads that deliver the webhook outbox.
+
+    Payloads are posted over one pooled session. Failures (network errors
+    and non-2xx responses) are retried with jittered exponential backoff;
+    after max_attempts the delivery is marked dead and kept for inspection
+    or requeue_dead().
+
+    With batch_size > 1, waiting deliveries for the same URL are sent
+    together as one gzip-compressed JSON-lines POST once batch_size of them
+    or batch_max_bytes of payload are waiting, or the oldest has waited
+    batch_max_delay seconds. A batch succeeds or fails as a whole.
+    """
+
+    def __init__(self, threads: int = WEBHOOK_WORKERS, max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+                 timeout: float = WEBHOOK_TIMEOUT, poll_interval: float = 2.0, batch_size: int = WEBHOOK_BATCH_SIZE,
+                 batch_max_bytes: int = WEBHOOK_BATCH_MAX_BYTES, batch_max_delay: float = WEBHOOK_BATCH_MAX_DELAY):
+        self.threads = threads
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.batch_max_bytes = batch_max_bytes
+        self.batch_max_delay = batch_max_delay
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, threads))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._counters = {"delivered": 0, "failed_attempts": 0, "dead": 0, "requests": 0, "bytes_sent": 0}
+        self._latency = Histogram(LATENCY_BUCKETS_MS)
+
+    def start(self):
+        """Start the dispatcher threads (no-op if already running)"""
+        if any(t.is_alive() for t in self._workers):
+            return
+        self._stop.clear()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"webhook-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for thread in self._workers:
+            thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._workers:
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake idle dispatchers, e.g. right after a lead was saved"""
+        self._wake.set()
+
+    def stats(self) -> dict:
+        """Delivery counters, delivery latency (ms) and the outbox size per status"""
+        with self._lock:
+            stats = dict(self._counters, latency_ms=self._latency.to_dict())
+        stats["outbox"] = get_outbox_counts()
+        return stats
+
+    @property
+    def batching(self) -> bool:
+        return self.batch_size > 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.poll_interval
+            try:
+                if self.batching:
+                    rows, due_in = claim_batch(self.batch_size, self.batch_max_bytes, self.batch_max_delay)
+                    if rows:
+                        self.deliver_batch(rows)
+                    elif due_in is not None:
+                        wait = min(wait, max(0.05, due_in))
+                else:
+                    rows = claim_deliveries()
+                    for delivery in rows:
+                        self.deliver(*delivery)
+            except sqlite3.Error as e:
+                print(f"Webhook outbox unavailable: {e}")
+                rows = []
+            if not rows:
+                self._wake.wait(wait)
+                self._wake.clear()
+
+    def deliver(self, delivery_id: int, url: str, payload: str, attempts: int) -> bool:
+        """Make one delivery attempt and record the outcome"""
+        headers = {"Content-Type": "application/json", "X-Broadgate-Delivery-Id": str(delivery_id)}
+        return self._post(url, payload.encode("utf-8"), headers, [(delivery_id, attempts)])
+
+    def deliver_batch(self, rows: list) -> bool:
+        """Send claimed deliveries (all for the same URL) as one compressed JSON-lines POST"""
+        body = encode_batch(rows)
+        headers = {
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+            "X-Broadgate-Batch-Id": uuid.uuid4().hex,
+            "X-Broadgate-Batch-Size": str(len(rows)),
+        }
+        return self._post(rows[0][1], body, headers, [(row[0], row[3]) for row in rows])
+
+    def _post(self, url: str, body: bytes, headers: dict, deliveries: list) -> bool:
+        """POST one body on behalf of deliveries [(id, attempts so far)] and record the outcome for each"""
+        started = time.perf_counter()
+        try:
+            response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            error = None
+        except requests.RequestException as e:
+            error = e
+
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["bytes_sent"] += len(body)
+            if error is None:
+                self._counters["delivered"] += len(deliveries)
+                self._latency.observe((time.perf_counter() - started) * 1000)
+            else:
+                self._counters["failed_attempts"] += len(deliveries)
+                self._counters["dead"] += sum(1 for _, attempts in deliveries if attempts + 1 >= self.max_attempts)
+
+        for delivery_id, attempts in deliveries:
+            attempts += 1
+            if error is None:
+                _record(delivery_id, "delivered", attempts)
+            elif attempts >= self.max_attempts:
+                print(f"✗ Webhook delivery {delivery_id} dead after {attempts} attempts: {error}")
+                _record(delivery_id, "dead", attempts, error=str(error))
+            else:
+                _record(delivery_id, "pending", attempts, time.time() + _backoff(attempts), str(error))
+        return error is None
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_webhook_dispatcher():
+    """
+    Get the process-wide webhook dispatcher, starting it on first use
+
+    Returns:
+        WebhookDispatcher, or None when WEBHOOK_WORKERS is 0
+    """
+    global _dispatcher
+    if WEBHOOK_WORKERS <= 0:
+        return None
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = WebhookDispatcher()
+            _dispatcher.start()
+    return _dispatcher
+
+
+def notify_dispatcher():
+    """Wake this process' dispatcher if it is running"""
+    if _dispatcher is not None:
+        _dispatcher.notify()
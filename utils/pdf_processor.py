@@ -1,30 +1,165 @@
+import hashlib
 import os
 import pypdf
+from concurrent.futures import ProcessPoolExecutor
+from config import PDF_WORKERS
+from .cache import DiskCache
 
-def extract_text_from_pdf(file_path: str) -> str:
+_pdf_cache = None
+
+# (path, mtime_ns, size, options) -> text, for lookups that never leave the process
+_memo = {}
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list:
+    """Extract the text of pages [start, stop) - runs in a worker process"""
+    with open(file_path, 'rb') as file:
+        reader = pypdf.PdfReader(file)
+        return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _iter_page_texts(file_path: str, start: int, stop: int, workers: int):
+    """Yield page texts in order, extracting page ranges in parallel when workers > 1"""
+    if workers <= 1 or stop - start < 2 * workers:
+        with open(file_path, 'rb') as file:
+            reader = pypdf.PdfReader(file)
+            for i in range(start, stop):
+                yield reader.pages[i].extract_text()
+        return
+
+    # Several ranges per worker keeps them all busy when page sizes vary
+    batch = max(1, -(-(stop - start) // (workers * 4)))
+    ranges = [(i, min(i + batch, stop)) for i in range(start, stop, batch)]
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_extract_page_range, file_path, a, b) for a, b in ranges]
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Stops outstanding ranges if the caller stopped early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract(file_path: str, workers: int, page_range: tuple, max_pages: int, max_chars: int) -> str:
+    parts = []
+    try:
+        with open(file_path, 'rb') as file:
+            page_count = len(pypdf.PdfReader(file).pages)
+
+        start, stop = page_range or (0, page_count)
+        start, stop = max(0, start), min(stop, page_count)
+        if max_pages is not None:
+            stop = min(stop, start + max_pages)
+
+        extracted = 0
+        pages = _iter_page_texts(file_path, start, stop, workers)
+        try:
+            for page_text in pages:
+                parts.append(page_text)
+                extracted += len(page_text) + 1
+                if max_chars is not None and extracted >= max_chars:
+                    break
+        finally:
+            pages.close()
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return ""
+
+    return "\n".join(parts).strip()
+
+
+def _file_digest(file_path: str) -> str:
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _get_cache() -> DiskCache:
+    """Get the shared on-disk cache of extracted PDF text"""
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = DiskCache("pdf")
+    return _pdf_cache
+
+
+def _cached_extract(file_path: str, options: tuple, extract) -> str:
+    """
+    Look up extracted text by file content hash, extracting on a miss.
+
+    A stat record (mtime + size -> content hash) lets unchanged files skip
+    hashing; an in-process memo keyed on the same stat skips the disk too.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size, options)
+    text = _memo.get(memo_key)
+    if text is not None:
+        return text
+
+    cache = _get_cache()
+    stat_entry = cache.get(f"stat:{path}")
+    if stat_entry and stat_entry.get("mtime_ns") == stat.st_mtime_ns and stat_entry.get("size") == stat.st_size:
+        digest = stat_entry["digest"]
+    else:
+        digest = _file_digest(path)
+        cache.set(f"stat:{path}", {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "digest": digest})
+
+    text_key = f"text:{digest}:{options!r}"
+    text_entry = cache.get(text_key)
+    if text_entry is not None:
+        text = text_entry["text"]
+    else:
+        text = extract()
+        if not text:
+            # Don't remember failures; the next call should try again
+            return text
+        cache.set(text_key, {"digest": digest, "text": text})
+
+    # Forget text from earlier versions of this file
+    for key in [k for k in _memo if k[0] == path and k[3] == options]:
+        del _memo[key]
+    _memo[memo_key] = text
+    return text
+
+
+def extract_text_from_pdf(file_path: str, workers: int = None, page_range: tuple = None, max_pages: int = None, max_chars: int = None, use_cache: bool = True) -> str:
     """
     Extract text from a PDF file.
-    
+
+    Extracted text is cached on disk keyed by the file's content hash (with
+    mtime and size as a cheap pre-check), so it is shared between processes
+    and invalidated automatically when the file changes.
+
     Args:
         file_path: Path to the PDF file
-        
+        workers: Number of processes extracting page ranges in parallel
+                 (defaults to config PDF_WORKERS; 1 = in-process)
+        page_range: Optional (start, stop) zero-based page range to read
+        max_pages: Stop after this many pages
+        max_chars: Stop once at least this much text has been extracted
+        use_cache: Read from and write to the extracted-text cache
+
     Returns:
         Extracted text as a string
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF file not found: {file_path}")
-        
-    text = ""
-    try:
-        with open(file_path, 'rb') as file:
-            reader = pypdf.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-    except Exception as e:
-        print(f"Error reading PDF: {e}")
-        return ""
-        
-    return text.strip()
+
+    if workers is None:
+        workers = PDF_WORKERS
+
+    def extract():
+        return _extract(file_path, workers, page_range, max_pages, max_chars)
+
+    if not use_cache:
+        return extract()
+
+    options = (tuple(page_range) if page_range else None, max_pages, max_chars)
+    return _cached_extract(file_path, options, extract)
 
 def find_pdf_in_dir(directory: str) -> str:
     """
@@ -0,0 +1,177 @@
+"""
+Broadgate - Knowledge Snapshot Module
+Prebuilt, compressed knowledge base files loaded with memory mapping
+
+File layout (all integers big-endian):
+
+    magic        4 bytes   b"BGKS"
+    version      uint16
+    index_len    uint32
+    index        index_len bytes of UTF-8 JSON
+    sections     zlib-compressed section bodies, back to back
+
+The JSON index holds the build metadata and, per section, its name, kind
+("website" or "document"), offset (from the start of the file), compressed
+length, uncompressed length and SHA-256.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from .web_scraper import format_pages
+
+
+MAGIC = b"BGKS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">4sHI")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, corrupt or from an unknown version"""
+
+
+def write_snapshot(path: str, sections: list, metadata: dict = None, level: int = 9) -> dict:
+    """
+    Write a knowledge snapshot file atomically
+
+    Args:
+        path: Destination file
+        sections: List of (name, kind, text) tuples, in the order they should be combined
+        metadata: Extra build information stored in the index
+        level: zlib compression level
+
+    Returns:
+        The index that was written
+    """
+    bodies = []
+    entries = []
+    for name, kind, text in sections:
+        raw = text.encode("utf-8")
+        body = zlib.compress(raw, level)
+        bodies.append(body)
+        entries.append({
+            "name": name,
+            "kind": kind,
+            "length": len(body),
+            "raw_length": len(raw),
+            "sha256": hashlib.sha256(raw).hexdigest(),
+        })
+
+    index = dict(metadata or {}, version=FORMAT_VERSION, built_at=time.time(), sections=entries)
+
+    # Offsets depend on the index size, which depends on the offsets' digits;
+    # settle it by serialising until the size stops changing
+    index_bytes = b""
+    while True:
+        offset = _HEADER.size + len(index_bytes)
+        for entry, body in zip(entries, bodies):
+            entry["offset"] = offset
+            offset += len(body)
+        encoded = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        if len(encoded) == len(index_bytes):
+            break
+        index_bytes = encoded
+    index_bytes = encoded
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes)))
+            f.write(index_bytes)
+            for body in bodies:
+                f.write(body)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return index
+
+
+class SnapshotReader:
+    """
+    Memory-mapped view of a snapshot file.
+
+    Only the header and index are read on open; each section is
+    decompressed the first time it is asked for and kept afterwards.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"Snapshot file is empty: {path}")
+
+        try:
+            magic, version, index_len = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise SnapshotError(f"Snapshot file is truncated: {path}")
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f"Not a knowledge snapshot: {path}")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"Unsupported snapshot version {version} (expected {FORMAT_VERSION})")
+
+        # A build interrupted mid-write leaves a cut-off index or sections
+        try:
+            if _HEADER.size + index_len > len(self._map):
+                raise ValueError("index runs past the end of the file")
+            self.index = json.loads(self._map[_HEADER.size:_HEADER.size + index_len].decode("utf-8"))
+            self._sections = {entry["name"]: entry for entry in self.index["sections"]}
+            for entry in self._sections.values():
+                if entry["offset"] < _HEADER.size + index_len or entry["offset"] + entry["length"] > len(self._map):
+                    raise ValueError(f"section {entry['name']!r} runs past the end of the file")
+        except (ValueError, KeyError, TypeError) as e:
+            self.close()
+            raise SnapshotError(f"Snapshot index is corrupt in {path}: {e}")
+        self._texts = {}
+        self._lock = threading.Lock()
+
+    def section_names(self, kind: str = None) -> list:
+        """Section names in build order, optionally only those of one kind"""
+        return [e["name"] for e in self.index["sections"] if kind is None or e["kind"] == kind]
+
+    def section(self, name: str) -> str:
+        """Decompressed text of one section"""
+        with self._lock:
+            text = self._texts.get(name)
+            if text is None:
+                entry = self._sections[name]
+                body = self._map[entry["offset"]:entry["offset"] + entry["length"]]
+                try:
+                    raw = zlib.decompress(body)
+                except zlib.error as e:
+                    raise SnapshotError(f"Section {name!r} is corrupt in {self.path}: {e}")
+                if hashlib.sha256(raw).hexdigest() != entry["sha256"]:
+                    raise SnapshotError(f"Section {name!r} is corrupt in {self.path}")
+                text = raw.decode("utf-8")
+                self._texts[name] = text
+        return text
+
+    def combined_text(self, kind: str = None) -> str:
+        """Sections of one kind (or all) combined in the scrape_multiple_pages format"""
+        return format_pages((name, self.section(name)) for name in self.section_names(kind))
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
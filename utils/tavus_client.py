@@ -0,0 +1,341 @@
+"""
+Broadgate - Tavus HTTP Client
+Shared, pooled and retrying HTTP session for the Tavus API
+"""
+
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from config import (
+    TAVUS_API_KEY, TAVUS_BASE_URL, TAVUS_POOL_SIZE, TAVUS_MAX_RETRIES,
+    TAVUS_RATE_LIMIT, TAVUS_RATE_BURST
+)
+from .metrics import ApiMetrics, get_api_metrics
+
+
+# (connect, read) timeouts in seconds per endpoint; creating a conversation
+# waits on Tavus provisioning, so it gets the longest read timeout
+DEFAULT_TIMEOUT = (3.05, 15)
+TIMEOUTS = {
+    "documents.list": (3.05, 15),
+    "documents.create": (3.05, 30),
+    "personas.list": (3.05, 15),
+    "personas.get": (3.05, 10),
+    "personas.create": (3.05, 30),
+    "personas.update": (3.05, 15),
+    "conversations.create": (3.05, 30),
+    "conversations.end": (3.05, 10),
+    "conversations.messages": (3.05, 15),
+}
+
+# Statuses worth retrying; 429 and 503 are also the ones that send Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """Whether a request failed before reaching the server (so repeating it is always safe)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available; returns the seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future token, so waiters are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class _Flight:
+    """One in-flight GET that identical GETs wait on instead of sending their own"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+# Endpoints that get a rate-limit class of their own: transcript polling by
+# the post-call workers must not use up the tokens that a user starting a
+# conversation needs
+OWN_CLASS_ENDPOINTS = ("conversations.messages",)
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Rate-limit class of an endpoint name ("personas.get" is in "personas")"""
+    if endpoint in OWN_CLASS_ENDPOINTS:
+        return endpoint
+    return endpoint.split(".", 1)[0] if endpoint else "default"
+
+
+class TavusClient:
+    """
+    One keep-alive connection pool for every Tavus call in the process.
+
+    Requests are retried with jittered exponential backoff (or the server's
+    Retry-After) on connection failures and on 429/5xx responses. Calls that
+    are not idempotent (POST/PATCH unless marked otherwise) are only retried
+    when the server cannot have acted on them: a failed connect or a 429.
+
+    Every attempt first takes a token from its endpoint class' bucket
+    ("personas", "conversations", "conversations.messages", ...), so bursts
+    from many sessions are smoothed out client-side instead of tripping
+    Tavus' rate limits.
+    Identical GETs that are in flight at the same time are coalesced: one
+    request goes out and every caller gets its response (or its error).
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, pool_size: int = None, max_retries: int = None,
+                 backoff: float = 0.5, rate_limits: dict = None, coalesce: bool = True, metrics: ApiMetrics = None):
+        self.api_key = api_key if api_key is not None else TAVUS_API_KEY
+        self.base_url = (base_url or TAVUS_BASE_URL).rstrip("/")
+        self.max_retries = TAVUS_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff
+        self.coalesce = coalesce
+        self.metrics = metrics or get_api_metrics()
+
+        # endpoint class -> (rate per second, burst); classes not listed use the
+        # TAVUS_RATE_LIMIT default, and a rate of 0 disables limiting
+        self.rate_limits = dict(rate_limits or {})
+        self._buckets = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size or TAVUS_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _headers(self) -> dict:
+        if not self.api_key:
+            raise ValueError("API_KEY missing. Please configure it in Streamlit Cloud secrets or .env file")
+        return {"x-api-key": self.api_key}
+
+    def _delay(self, attempt: int, response: requests.Response = None) -> float:
+        """Seconds to wait before the next attempt, honouring Retry-After"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(60.0, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    return min(60.0, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(8.0, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, path: str, endpoint: str = None, idempotent: bool = None,
+                ok_statuses: tuple = (), **kwargs) -> requests.Response:
+        """
+        Send a request to the Tavus API
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL, e.g. "/v2/personas"
+            endpoint: Endpoint name used to pick the timeout (see TIMEOUTS)
+            idempotent: Whether repeating the call is safe (defaults by method)
+            ok_statuses: Error statuses to return instead of raising (e.g. (404,))
+            **kwargs: Passed to requests (json, params, ...)
+
+        Returns:
+            The response; raises requests.HTTPError for other error statuses
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+
+        if method != "GET" or not self.coalesce:
+            return self._send(method, path, endpoint, idempotent, ok_statuses, kwargs)
+
+        key = (path, json.dumps(kwargs.get("params"), sort_keys=True, default=str), ok_statuses)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count(endpoint, "coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._send(method, path, endpoint, idempotent, ok_statuses, kwargs)
+            flight.response.content  # read the body now so every waiter can parse it
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _send(self, method: str, path: str, endpoint: str, idempotent: bool, ok_statuses: tuple, kwargs: dict) -> requests.Response:
+        """Send one logical request, recording it in the call metrics when they are enabled"""
+        if not self.metrics.enabled:
+            return self._send_with_retries(method, path, endpoint, idempotent, ok_statuses, kwargs)
+
+        call = {"retries": 0, "response": None}
+        status = None
+        started = time.perf_counter()
+        try:
+            response = self._send_with_retries(method, path, endpoint, idempotent, ok_statuses, kwargs, call)
+            status = response.status_code
+            return response
+        except Exception as e:
+            response = getattr(e, "response", None)
+            status = response.status_code if response is not None else type(e).__name__
+            raise
+        finally:
+            response = call["response"]
+            self.metrics.record(
+                endpoint, status, time.perf_counter() - started, call["retries"],
+                len(response.request.body or b"") if response is not None else 0,
+                len(response.content) if response is not None else 0,
+            )
+
+    def _send_with_retries(self, method: str, path: str, endpoint: str, idempotent: bool, ok_statuses: tuple,
+                           kwargs: dict, call: dict = None) -> requests.Response:
+        """Send one logical request, rate limited and with retries; call collects retries/response for metrics"""
+        headers = self._headers()
+        url = f"{self.base_url}{path}"
+        bucket = self._bucket(endpoint)
+
+        attempt = 0
+        while True:
+            if bucket is not None:
+                waited = bucket.acquire()
+                if waited:
+                    self._count(endpoint, "throttled", waited)
+            self._count(endpoint, "requests")
+            if call is not None:
+                call["retries"] = attempt
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or _never_sent(e)):
+                    raise
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if call is not None:
+                call["response"] = response
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries \
+                    and (idempotent or response.status_code == 429):
+                time.sleep(self._delay(attempt, response))
+                attempt += 1
+                continue
+
+            if response.status_code not in ok_statuses:
+                response.raise_for_status()
+            return response
+
+    def _bucket(self, endpoint: str):
+        """Token bucket for the endpoint's class, or None if it isn't limited"""
+        name = endpoint_class(endpoint)
+        with self._lock:
+            if name not in self._buckets:
+                rate, burst = self.rate_limits.get(name, (TAVUS_RATE_LIMIT, TAVUS_RATE_BURST))
+                self._buckets[name] = TokenBucket(rate, burst) if rate > 0 else None
+            return self._buckets[name]
+
+    def _count(self, endpoint: str, counter: str, waited: float = 0.0):
+        with self._lock:
+            counters = self._counters.setdefault(
+                endpoint_class(endpoint), {"requests": 0, "coalesced": 0, "throttled": 0, "throttle_wait": 0.0}
+            )
+            counters[counter] += 1
+            counters["throttle_wait"] += waited
+
+    def stats(self) -> dict:
+        """
+        Per endpoint class: requests sent (including retries), GETs coalesced
+        into another caller's request, requests throttled by the limiter and
+        the total seconds spent waiting for it
+        """
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._counters.items()}
+
+    def iter_list(self, path: str, endpoint: str = None, page_size: int = 100, params: dict = None):
+        """
+        Iterate over every item of a paginated list endpoint
+
+        Pages are requested with Tavus' page/limit query parameters until a
+        short or empty page, or total_count items, have been seen.
+
+        Args:
+            path: List endpoint path, e.g. "/v2/personas"
+            endpoint: Endpoint name used to pick the timeout
+            page_size: Items requested per page
+            params: Extra query parameters
+        """
+        page = 1
+        seen = 0
+        first_of_previous = None
+        while True:
+            query = dict(params or {}, page=page, limit=page_size)
+            data = self.get(path, endpoint, params=query).json()
+            items = data.get("data", []) if isinstance(data, dict) else data
+            if not items or items[0] == first_of_previous:
+                # Empty page, or a server that ignores paging and repeats itself
+                return
+            yield from items
+            seen += len(items)
+
+            total = data.get("total_count") if isinstance(data, dict) else None
+            if len(items) < page_size or len(items) > page_size or (total is not None and seen >= total):
+                return
+            first_of_previous = items[0]
+            page += 1
+
+    def get(self, path: str, endpoint: str = None, **kwargs) -> requests.Response:
+        return self.request("GET", path, endpoint, **kwargs)
+
+    def post(self, path: str, endpoint: str = None, **kwargs) -> requests.Response:
+        return self.request("POST", path, endpoint, **kwargs)
+
+    def patch(self, path: str, endpoint: str = None, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, endpoint, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> TavusClient:
+    """Get the process-wide Tavus client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TavusClient()
+    return _client
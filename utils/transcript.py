@@ -0,0 +1,119 @@
+"""
+Broadgate - Transcript Module
+Incremental, cursor-based fetching of conversation messages
+"""
+
+import threading
+from collections import OrderedDict
+from .api import get_conversation_messages
+
+
+def message_text(msg: dict) -> str:
+    """Text of one message, whichever key the API put it under"""
+    text = (
+        msg.get("text") or
+        msg.get("content") or
+        msg.get("message") or
+        msg.get("transcript") or
+        ""
+    )
+    return str(text) if text else ""
+
+
+def message_key(msg: dict):
+    """Identity of a message: its id if it has one, else its timestamp, role and text"""
+    for key in ("message_id", "id", "uuid"):
+        if msg.get(key):
+            return msg[key]
+    return (msg.get("timestamp") or msg.get("created_at"), msg.get("role"), message_text(msg))
+
+
+class TranscriptBuffer:
+    """
+    Append-only local copy of one conversation's messages.
+
+    poll() asks the API only for messages after the last one seen (the id
+    is sent as the after cursor). Servers that ignore the cursor and return
+    everything are handled too: the already-seen prefix is cut off locally,
+    so callers still only ever see each message once. The joined text is
+    extended rather than rebuilt, and extractors can keep their own state
+    (fields) and position (scanned) here so they only look at the delta.
+    """
+
+    def __init__(self, conv_id: str, fetch=get_conversation_messages):
+        self.conv_id = conv_id
+        self.fetch = fetch
+        self.messages = []
+        self.cursor = None  # message_key of the last message
+        self.fields = {}    # field -> FieldMatch extracted so far
+        self.scanned = 0    # messages already run through the extractors
+        self._parts = []
+        self._text = ""
+        self._lock = threading.Lock()
+
+    def poll(self) -> list:
+        """Fetch and append messages newer than the cursor; returns only those"""
+        with self._lock:
+            # Content-based keys (messages without ids) can't be sent as a cursor
+            cursor_id = None if isinstance(self.cursor, tuple) else self.cursor
+            fetched = self.fetch(self.conv_id, after=cursor_id)
+            new = self._after_cursor(fetched or [])
+            if new:
+                self.messages.extend(new)
+                self.cursor = message_key(new[-1])
+                self._parts.extend(t for t in map(message_text, new) if t)
+                self._text = None
+            return new
+
+    def _after_cursor(self, fetched: list) -> list:
+        if self.cursor is None:
+            return list(fetched)
+        # A full list contains the cursor message; a delta doesn't
+        for i in range(len(fetched) - 1, -1, -1):
+            if message_key(fetched[i]) == self.cursor:
+                return list(fetched[i + 1:])
+        return list(fetched)
+
+    @property
+    def text(self) -> str:
+        """All message text so far, one message per line"""
+        with self._lock:
+            if self._text is None:
+                self._text = "\n".join(self._parts)
+            return self._text
+
+    def unscanned(self) -> tuple:
+        """(index of the first, messages) not yet seen by the extractors; marks them as scanned"""
+        with self._lock:
+            start = self.scanned
+            self.scanned = len(self.messages)
+            return start, self.messages[start:]
+
+
+_buffers = OrderedDict()
+_buffers_lock = threading.Lock()
+MAX_BUFFERS = 256
+
+
+def get_transcript_buffer(conv_id: str) -> TranscriptBuffer:
+    """Get (or create) the buffer for a conversation; the least recently used are dropped past MAX_BUFFERS"""
+    with _buffers_lock:
+        buffer = _buffers.get(conv_id)
+        if buffer is None:
+            buffer = _buffers[conv_id] = TranscriptBuffer(conv_id)
+            while len(_buffers) > MAX_BUFFERS:
+                _buffers.popitem(last=False)
+        else:
+            _buffers.move_to_end(conv_id)
+        return buffer
+
+
+def drop_transcript_buffer(conv_id: str):
+    """Forget a conversation's buffer once it is finished with"""
+    with _buffers_lock:
+        _buffers.pop(conv_id, None)
+
+
+def fetch_new_messages(conv_id: str) -> list:
+    """Messages of a conversation that previous calls haven't returned yet"""
+    return get_transcript_buffer(conv_id).poll()
@@ -3,82 +3,635 @@ Web scraper utility for extracting content from websites
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from html.parser import HTMLParser
 from typing import Optional
+from urllib.parse import urlparse
+import codecs
+import importlib.util
+import random
+import re
+import threading
 import time
+from config import SCRAPE_CACHE_TTL, SCRAPE_PARSER, SCRAPE_MAX_BYTES, SCRAPE_ALLOWED_TYPES
+from .cache import DiskCache, is_fresh
 
 
-def scrape_website(url: str, max_retries: int = 3) -> Optional[str]:
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+_scrape_cache = None
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Get the shared keep-alive session used for all page downloads"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+def _backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter for the given (zero-based) attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _get_cache() -> DiskCache:
+    """Get the shared on-disk cache of scraped pages"""
+    global _scrape_cache
+    if _scrape_cache is None:
+        _scrape_cache = DiskCache("scrape")
+    return _scrape_cache
+
+
+# Elements removed from the page before extracting text
+SKIP_TAGS = frozenset(["script", "style", "nav", "footer", "header"])
+
+# Elements whose text html.parser/BeautifulSoup never reports from get_text()
+_HIDDEN_TEXT_TAGS = frozenset(["template", "rt", "rp"])
+
+# Elements whose whitespace-only text is kept as-is
+_PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "textarea"])
+
+_ASCII_SPACES = " \n\t\x0c\r"
+
+# Elements that never have a closing tag
+_VOID_TAGS = frozenset([
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr",
+    "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid",
+    "param", "source", "spacer", "track", "wbr"
+])
+
+
+def _clean_lines(lines):
+    """Yield the non-empty, whitespace-trimmed phrases of each text line"""
+    for line in lines:
+        for phrase in line.strip().split("  "):
+            phrase = phrase.strip()
+            if phrase:
+                yield phrase
+
+
+class TextExtractor(HTMLParser):
     """
-    Scrape text content from a website
+    Single-pass HTML to text converter.
+
+    Text is emitted as the markup is fed in, skipping everything inside
+    SKIP_TAGS, and each completed line is cleaned up immediately, so no
+    document tree is ever built. Open elements and whitespace-only strings
+    are handled the same way BeautifulSoup's html.parser builder handles
+    them, so the result matches html_to_text(..., parser="bs4").
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._stack = []
+        self._hidden = 0
+        self._preserve = 0
+        self._data = []
+        self._partial = []
+        self._phrases = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in _VOID_TAGS:
+            return
+        self._stack.append(tag)
+        if tag in SKIP_TAGS or tag in _HIDDEN_TEXT_TAGS:
+            self._hidden += 1
+        if tag in _PRESERVE_WHITESPACE_TAGS:
+            self._preserve += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        # Like BeautifulSoup, close the most recent matching element and
+        # everything opened after it; stray end tags are ignored
+        if tag not in self._stack:
+            return
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in SKIP_TAGS or open_tag in _HIDDEN_TEXT_TAGS:
+                self._hidden -= 1
+            if open_tag in _PRESERVE_WHITESPACE_TAGS:
+                self._preserve -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[6:])
+            self._flush()
+
+    def _flush(self):
+        """Emit the text collected since the last tag"""
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if self._hidden:
+            return
+        if not self._preserve and not data.strip(_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        if not data:
+            return
+        # Only the new text is split; an unterminated last line is held back as
+        # pieces until a line break (or the end) arrives, so long lines stay linear
+        lines = data.splitlines(True)
+        tail = lines.pop() if lines[-1].splitlines()[0] == lines[-1] else None
+        if lines:
+            if self._partial:
+                lines[0] = "".join(self._partial) + lines[0]
+                self._partial = []
+            self._phrases.extend(_clean_lines(lines))
+        if tail is not None:
+            self._partial.append(tail)
+
+    def text(self) -> str:
+        """Finish parsing and return the cleaned-up text"""
+        self.close()
+        self._flush()
+        if self._partial:
+            self._phrases.extend(_clean_lines(["".join(self._partial)]))
+            self._partial = []
+        return '\n'.join(self._phrases)
+
+
+def _decode(content: bytes) -> str:
+    """Decode HTML bytes the same way BeautifulSoup does"""
+    return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+def _stream_to_text(content: bytes) -> str:
+    extractor = TextExtractor()
+    extractor.feed(_decode(content))
+    return extractor.text()
+
+
+def _bs4_to_text(content: bytes) -> str:
+    # Parse HTML
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(list(SKIP_TAGS)):
+        script.decompose()
+    
+    # Get text
+    text = soup.get_text()
+    
+    # Clean up text
+    return '\n'.join(_clean_lines(text.splitlines()))
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse a whitespace-only string the way BeautifulSoup does"""
+    if text.strip(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+# lxml refuses str input that still declares an encoding
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def _lxml_to_text(content: bytes) -> str:
+    from lxml import etree, html
+    
+    # Decode like the other backends; left to itself lxml reads undeclared UTF-8 as Latin-1
+    markup = _XML_DECLARATION.sub("", _decode(content), count=1)
+    try:
+        tree = html.document_fromstring(markup)
+    except etree.ParserError:
+        # lxml refuses documents without any elements or text
+        return ""
+    etree.strip_elements(tree, etree.Comment, etree.ProcessingInstruction, *SKIP_TAGS, *_HIDDEN_TEXT_TAGS, with_tail=False)
+    
+    strings = []
+    preserve = 0
+    for event, element in etree.iterwalk(tree, events=("start", "end")):
+        if event == "start":
+            if element.tag in _PRESERVE_WHITESPACE_TAGS:
+                preserve += 1
+            if element.text:
+                strings.append(element.text if preserve else _collapse_whitespace(element.text))
+        else:
+            if element.tag in _PRESERVE_WHITESPACE_TAGS:
+                preserve -= 1
+            if element.tail and element is not tree:
+                strings.append(element.tail if preserve else _collapse_whitespace(element.tail))
+    return '\n'.join(_clean_lines("".join(strings).splitlines()))
+
+
+def _selectolax_to_text(content: bytes) -> str:
+    try:
+        from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser as FastHTMLParser
+    
+    tree = FastHTMLParser(_decode(content))
+    tree.strip_tags(list(SKIP_TAGS | _HIDDEN_TEXT_TAGS))
+    if tree.root is None:
+        return ""
+    
+    strings = []
+    for node in tree.root.traverse(include_text=True):
+        if node.tag == "-text":
+            text = node.text_content or ""
+            preserved = any(parent.tag in _PRESERVE_WHITESPACE_TAGS for parent in _ancestors(node))
+            strings.append(text if preserved else _collapse_whitespace(text))
+    return '\n'.join(_clean_lines("".join(strings).splitlines()))
+
+
+def _ancestors(node):
+    parent = node.parent
+    while parent is not None:
+        yield parent
+        parent = parent.parent
+
+
+PARSERS = {
+    "stream": _stream_to_text,
+    "bs4": _bs4_to_text,
+    "lxml": _lxml_to_text,
+    "selectolax": _selectolax_to_text,
+}
+
+
+def _resolve_parser(name: str) -> str:
+    """Pick a parser backend; 'auto' prefers the fast native engines when installed"""
+    if name != "auto":
+        if name not in PARSERS:
+            raise ValueError(f"Unknown HTML parser '{name}'. Choose from: auto, {', '.join(PARSERS)}")
+        return name
+    for candidate in ("selectolax", "lxml"):
+        if importlib.util.find_spec(candidate) is not None:
+            return candidate
+    return "stream"
+
+
+def html_to_text(content: bytes, parser: str = None) -> str:
+    """
+    Convert an HTML document to cleaned-up plain text
     
     Args:
-        url: The URL to scrape
-        max_retries: Maximum number of retry attempts
+        content: Raw HTML bytes
+        parser: Backend to use (defaults to config SCRAPE_PARSER):
+                "stream" - single pass over the stdlib tokenizer, same output as "bs4"
+                "bs4"    - BeautifulSoup tree with html.parser (the original implementation)
+                "lxml" / "selectolax" - native engines; same output for well-formed
+                           pages, may differ where they repair broken markup
+                "auto"   - selectolax or lxml when installed, otherwise "stream"
         
     Returns:
-        Extracted text content or None if failed
+        The page text with scripts, styles, navigation, header and footer removed
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
-    for attempt in range(max_retries):
+    return PARSERS[_resolve_parser(parser or SCRAPE_PARSER)](content)
+
+
+@dataclass
+class ScrapeResult:
+    """Outcome of fetching one page, with a machine-readable reason on failure"""
+    url: str
+    text: Optional[str] = None
+    reason: str = "ok"           # one of the REASON_* constants
+    detail: str = ""
+    status_code: Optional[int] = None
+    bytes_read: int = 0
+    attempts: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content: Optional[bytes] = None  # raw body, only when requested
+
+    @property
+    def ok(self) -> bool:
+        return self.reason in (REASON_OK, REASON_CACHED, REASON_NOT_MODIFIED, REASON_STALE)
+
+
+REASON_OK = "ok"
+REASON_CACHED = "cached"              # served from a fresh cache entry
+REASON_NOT_MODIFIED = "not_modified"  # 304 from the server
+REASON_STALE = "stale"                # site failed, served an expired cache entry
+REASON_TOO_LARGE = "too_large"
+REASON_BAD_CONTENT_TYPE = "bad_content_type"
+REASON_HTTP_ERROR = "http_error"
+REASON_TIMEOUT = "timeout"
+REASON_NETWORK_ERROR = "network_error"
+REASON_DECODE_ERROR = "decode_error"
+
+# Failures worth another attempt; the rest will fail the same way again
+RETRYABLE_REASONS = (REASON_TIMEOUT, REASON_NETWORK_ERROR)
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([a-zA-Z0-9_-]+)""", re.IGNORECASE)
+
+
+def _sniff_encoding(head: bytes) -> Optional[str]:
+    """Find the encoding declared by a BOM or <meta> tag near the start of a page"""
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if head.startswith(bom):
+            return encoding
+    match = _META_CHARSET.search(head[:4096])
+    if match:
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return None
+
+
+def fetch_page(url: str, headers: dict = None, session: requests.Session = None, max_bytes: int = None,
+               allowed_types: tuple = None, parser: str = None, parse: bool = True, keep_body: bool = False) -> ScrapeResult:
+    """
+    Download one page as a stream, enforcing size and content-type limits
+    
+    The body is read in chunks and abandoned as soon as it exceeds max_bytes
+    or the Content-Type is not allowed. With the "stream" parser the text is
+    extracted incrementally as chunks arrive; other parsers run once the
+    (size-capped) body is complete.
+    
+    Args:
+        url: The URL to fetch
+        headers: Request headers (defaults to HEADERS)
+        session: HTTP session to use (defaults to the shared pooled session)
+        max_bytes: Maximum decompressed body size (defaults to config SCRAPE_MAX_BYTES)
+        allowed_types: Allowed Content-Type prefixes (defaults to config SCRAPE_ALLOWED_TYPES)
+        parser: HTML parser backend (see html_to_text)
+        parse: Extract text from the body; disable to only download it
+        keep_body: Return the raw body in ScrapeResult.content
+        
+    Returns:
+        ScrapeResult describing the page or why it could not be fetched
+    """
+    session = session or get_session()
+    max_bytes = max_bytes or SCRAPE_MAX_BYTES
+    allowed_types = allowed_types or SCRAPE_ALLOWED_TYPES
+    parser = _resolve_parser(parser or SCRAPE_PARSER)
+    result = ScrapeResult(url)
+    
+    try:
+        with session.get(url, headers=headers or HEADERS, timeout=10, stream=True) as response:
+            result.status_code = response.status_code
+            result.etag = response.headers.get('ETag')
+            result.last_modified = response.headers.get('Last-Modified')
             
-            # Get text
-            text = soup.get_text()
+            if response.status_code == 304:
+                result.reason = REASON_NOT_MODIFIED
+                return result
+            if response.status_code >= 400:
+                result.reason = REASON_HTTP_ERROR
+                result.detail = f"HTTP {response.status_code} {response.reason}"
+                return result
             
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type and not content_type.startswith(tuple(allowed_types)):
+                result.reason = REASON_BAD_CONTENT_TYPE
+                result.detail = f"Content-Type {content_type} is not allowed"
+                return result
             
-            return text
+            declared_length = response.headers.get('Content-Length')
+            if declared_length and declared_length.isdigit() and 'Content-Encoding' not in response.headers \
+                    and int(declared_length) > max_bytes:
+                result.reason = REASON_TOO_LARGE
+                result.detail = f"Content-Length {declared_length} exceeds {max_bytes} bytes"
+                return result
             
-        except requests.RequestException as e:
-            print(f"Attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2)  # Wait before retrying
+            chunks = []
+            extractor = None
+            decoder = None
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                result.bytes_read += len(chunk)
+                if result.bytes_read > max_bytes:
+                    result.reason = REASON_TOO_LARGE
+                    result.detail = f"Body exceeds {max_bytes} bytes"
+                    return result
+                chunks.append(chunk)
+                
+                if parse and parser == "stream" and extractor is not False:
+                    try:
+                        if extractor is None:
+                            decoder = codecs.getincrementaldecoder(_sniff_encoding(chunk) or "utf-8")()
+                            extractor = TextExtractor()
+                        extractor.feed(decoder.decode(chunk))
+                    except UnicodeDecodeError:
+                        # Not what it claimed to be; decode the whole body with detection at the end
+                        extractor = False
+    except requests.Timeout as e:
+        result.reason = REASON_TIMEOUT
+        result.detail = str(e)
+        return result
+    except requests.RequestException as e:
+        result.reason = REASON_NETWORK_ERROR
+        result.detail = str(e)
+        return result
+    
+    body = b"".join(chunks)
+    if keep_body:
+        result.content = body
+    if parse:
+        try:
+            if extractor:
+                extractor.feed(decoder.decode(b"", final=True))
+                result.text = extractor.text()
             else:
-                print(f"Failed to scrape {url} after {max_retries} attempts")
-                return None
+                result.text = html_to_text(body, parser)
+        except (UnicodeDecodeError, ValueError) as e:
+            result.reason = REASON_DECODE_ERROR
+            result.detail = str(e)
+    return result
+
+
+def scrape_page(url: str, max_retries: int = 3, use_cache: bool = True, cache_ttl: int = None, session: requests.Session = None,
+                max_bytes: int = None, allowed_types: tuple = None) -> ScrapeResult:
+    """
+    Scrape text content from a website, reporting what happened
     
-    return None
+    Pages are cached on disk by URL. A cached page younger than cache_ttl is
+    returned without touching the network. Older pages are revalidated with
+    a conditional GET (ETag / Last-Modified), and if the site is slow or down
+    the stale copy is returned instead of failing.
+    
+    Args:
+        url: The URL to scrape
+        max_retries: Maximum number of retry attempts
+        use_cache: Read from and write to the on-disk page cache
+        cache_ttl: Seconds a cached page is served without revalidation
+                   (defaults to config SCRAPE_CACHE_TTL)
+        session: HTTP session to use (defaults to the shared pooled session)
+        max_bytes: Maximum page size (defaults to config SCRAPE_MAX_BYTES)
+        allowed_types: Allowed Content-Type prefixes (defaults to config SCRAPE_ALLOWED_TYPES)
+        
+    Returns:
+        ScrapeResult; check .ok, and .reason / .detail on failure
+    """
+    if cache_ttl is None:
+        cache_ttl = SCRAPE_CACHE_TTL
+    
+    cache = _get_cache() if use_cache else None
+    cached = cache.get(url) if cache else None
+    
+    if cached and is_fresh(cached, cache_ttl):
+        return ScrapeResult(url, text=cached["text"], reason=REASON_CACHED)
+    
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers['If-None-Match'] = cached["etag"]
+        if cached.get("last_modified"):
+            headers['If-Modified-Since'] = cached["last_modified"]
+        # A stale copy is already on hand, so don't make the user sit through retries
+        max_retries = 1
+    
+    for attempt in range(max_retries):
+        result = fetch_page(url, headers, session, max_bytes, allowed_types)
+        result.attempts = attempt + 1
+        
+        if result.reason == REASON_NOT_MODIFIED and cached:
+            cached["stored_at"] = time.time()
+            cache.set(url, cached)
+            result.text = cached["text"]
+            return result
+        
+        if result.reason == REASON_OK:
+            if cache:
+                cache.set(url, {
+                    "url": url,
+                    "text": result.text,
+                    "etag": result.etag,
+                    "last_modified": result.last_modified,
+                    "stored_at": time.time()
+                })
+            return result
+        
+        if result.reason not in RETRYABLE_REASONS and result.status_code not in RETRYABLE_STATUS_CODES:
+            break
+        if attempt < max_retries - 1:
+            time.sleep(_backoff_delay(attempt))  # Wait before retrying
+    
+    if cached:
+        result.text = cached["text"]
+        result.detail = f"{result.reason}: {result.detail}"
+        result.reason = REASON_STALE
+    return result
+
+
+def scrape_website(url: str, max_retries: int = 3, use_cache: bool = True, cache_ttl: int = None, session: requests.Session = None) -> Optional[str]:
+    """
+    Scrape text content from a website
+    
+    Args:
+        url: The URL to scrape
+        max_retries: Maximum number of retry attempts
+        use_cache: Read from and write to the on-disk page cache
+        cache_ttl: Seconds a cached page is served without revalidation
+                   (defaults to config SCRAPE_CACHE_TTL)
+        session: HTTP session to use (defaults to the shared pooled session)
+        
+    Returns:
+        Extracted text content or None if failed (see scrape_page for the reason)
+    """
+    return scrape_page(url, max_retries, use_cache, cache_ttl, session).text
 
 
-def scrape_multiple_pages(urls: list[str]) -> str:
+def scrape_multiple_pages(urls: list[str], max_workers: int = 8, per_host_limit: int = 4) -> str:
     """
-    Scrape multiple pages and combine their content
+    Scrape multiple pages concurrently and combine their content
+    
+    Pages are fetched by a bounded thread pool over the shared keep-alive
+    session, with at most per_host_limit requests in flight to any one host.
+    Content is combined in the same order as urls.
     
     Args:
         urls: List of URLs to scrape
+        max_workers: Maximum number of pages fetched at once (1 = sequential)
+        per_host_limit: Maximum concurrent requests to a single host
         
     Returns:
         Combined text content from all pages
     """
+    host_limits = {}
+    for url in urls:
+        host = urlparse(url).netloc
+        if host not in host_limits:
+            host_limits[host] = threading.BoundedSemaphore(per_host_limit)
+    
+    def scrape_one(url):
+        with host_limits[urlparse(url).netloc]:
+            print(f"Scraping: {url}")
+            return scrape_page(url)
+    
+    if max_workers <= 1 or len(urls) <= 1:
+        results = [scrape_one(url) for url in urls]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+            results = list(executor.map(scrape_one, urls))
+    
+    for result in results:
+        if not result.text:
+            print(f"Warning: Could not scrape {result.url} ({result.reason}: {result.detail})")
+    
+    return format_pages((result.url, result.text) for result in results)
+
+
+def format_pages(pages) -> str:
+    """
+    Combine (url, text) pairs into a single knowledge base string
+    
+    Pages without text are skipped.
+    """
     all_content = []
     
-    for url in urls:
-        print(f"Scraping: {url}")
-        content = scrape_website(url)
+    for url, content in pages:
         if content:
             all_content.append(f"=== Content from {url} ===\n\n{content}\n\n")
-        else:
-            print(f"Warning: Could not scrape {url}")
     
     return "\n".join(all_content)
+
+
+PAGE_HEADER = re.compile(r"^=== Content from (.+?) ===$", re.MULTILINE)
+
+
+def split_pages(text: str) -> list:
+    """
+    Split text produced by format_pages back into (url, text) pairs
+    
+    Text without any page headers is returned as a single ("", text) pair.
+    """
+    headers = list(PAGE_HEADER.finditer(text))
+    if not headers:
+        return [("", text)]
+    
+    pages = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        pages.append((header.group(1), text[header.end():end].strip()))
+    return pages
@@ -3,24 +3,48 @@ Broadgate - Webhook Module
 Webhook integration and notification handling
 """
 
+import hashlib
 import requests
 from datetime import datetime
-from config import WEBHOOK_URL
+from config import WEBHOOK_URL, WEBHOOK_TRANSCRIPT, WEBHOOK_EXCERPT_CHARS
 
 
-def send_to_webhook(conv_id: str, name: str = None, email: str = None, transcript_text: str = ""):
-    """Send lead data to webhook endpoint"""
-    if not WEBHOOK_URL:
-        print("WEBHOOK_URL not configured, skipping webhook")
-        return
-    
+def build_webhook_payload(conv_id: str, name: str = None, email: str = None, transcript_text: str = "",
+                          transcript_mode: str = WEBHOOK_TRANSCRIPT) -> dict:
+    """
+    Build the lead payload sent to the webhook
+
+    transcript_mode "full" sends the whole transcript; "excerpt" sends its
+    first WEBHOOK_EXCERPT_CHARS characters and "digest" none of it. Both of
+    those add transcript_sha256 and transcript_length so the receiver can
+    tell whether it already has the full text.
+    """
     payload = {
         "conversation_id": conv_id,
         "name": name or "",
         "email": email or "",
-        "transcript": transcript_text,
         "timestamp": datetime.utcnow().isoformat()
     }
+    transcript_text = transcript_text or ""
+    if transcript_mode == "full":
+        payload["transcript"] = transcript_text
+        return payload
+
+    if transcript_mode == "excerpt":
+        payload["transcript"] = transcript_text[:WEBHOOK_EXCERPT_CHARS]
+        payload["transcript_truncated"] = len(transcript_text) > WEBHOOK_EXCERPT_CHARS
+    payload["transcript_sha256"] = hashlib.sha256(transcript_text.encode("utf-8")).hexdigest()
+    payload["transcript_length"] = len(transcript_text)
+    return payload
+
+
+def send_to_webhook(conv_id: str, name: str = None, email: str = None, transcript_text: str = ""):
+    """Send lead data to webhook endpoint right away (the app queues it through utils/outbox.py instead)"""
+    if not WEBHOOK_URL:
+        print("WEBHOOK_URL not configured, skipping webhook")
+        return
+    
+    payload = build_webhook_payload(conv_id, name, email, transcript_text)
     
     try:
         response = requests.post(WEBHOOK_URL, json=payload, timeout=5)